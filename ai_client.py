@@ -11,8 +11,11 @@ from config import get_config, is_available
 class AIClient:
     """Unified AI client interface"""
     
-    def __init__(self, provider: Optional[str] = None):
-        """Initialize AI client"""
+    def __init__(self, provider: Optional[str] = None, pool_size: int = 8):
+        """Initialize AI client
+        pool_size: keep-alive connections kept for concurrent requests (match the caller's concurrency)
+        """
+        self.pool_size = max(1, pool_size)
         self.config = get_config(provider)
         self.provider = self.config['provider']
         self.model_name = self.config.get('default_model')
@@ -87,10 +90,16 @@ class AIClient:
         """初始化Ollama客户端"""
         try:
             import requests
+            from requests.adapters import HTTPAdapter
             base_url = self.config.get('base_url', 'http://localhost:11434')
             self.model_name = self.config.get('default_model', 'llama2')
+            # Persistent session so consecutive requests reuse the keep-alive connection
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
             print(f"✓ 使用 Ollama 模型: {self.model_name} (base_url: {base_url})")
-            return {'base_url': base_url}
+            return {'base_url': base_url, 'session': session}
         except ImportError:
             raise ImportError("请安装 requests: pip install requests")
     
@@ -273,8 +282,6 @@ class AIClient:
     def _generate_ollama(self, prompt: str, **kwargs) -> Dict[str, Any]:
         """Ollama生成内容"""
         try:
-            import requests
-            
             url = f"{self.client['base_url']}/api/generate"
             data = {
                 "model": self.model_name,
@@ -286,7 +293,7 @@ class AIClient:
                 }
             }
             
-            response = requests.post(url, json=data, timeout=300)
+            response = self.client['session'].post(url, json=data, timeout=300)
             response.raise_for_status()
             
             result = response.json()
@@ -2,14 +2,38 @@ from newsplease import NewsPlease
 import json
 import requests
 from bs4 import BeautifulSoup
+import soupsieve
 from datetime import datetime, timedelta
 from urllib.parse import urljoin, urlparse
 import time
 import os
+import re
 from zoneinfo import ZoneInfo
 
 LIMIT_NUM = 25
 
+# URL fragments that mark non-article pages (category/tag listings, etc.)
+EXCLUDED_PATH_RE = re.compile(r'/(?:category|tag|author|page|archive)/')
+# Fallback scan additionally rejects in-page anchors
+EXCLUDED_FALLBACK_RE = re.compile(r'/(?:category|tag|author|page|archive)/|#')
+
+# Common news link selectors (needs adjustment based on actual website)
+# Try multiple possible selectors
+LINK_SELECTORS = [
+    'article a',           # Links within article tags
+    '.post a',             # Links within post class
+    '.article a',          # Links within article class
+    'h2 a', 'h3 a',        # Links within headings
+    '.entry-title a',      # Links within title class
+    '.news-item a',        # Links within news item class
+    'a[href*="/article/"]',  # Links containing /article/
+    'a[href*="/news/"]',      # Links containing /news/
+    'a[href*="/story/"]',     # Links containing /story/
+]
+
+# Compile selectors once so each homepage doesn't re-parse them
+COMPILED_LINK_SELECTORS = tuple(soupsieve.compile(s) for s in LINK_SELECTORS)
+
 # List of news platform homepages
 homepage_urls = [
     'https://punchng.com/',
@@ -88,6 +112,14 @@ def convert_to_nigeria_time(dt_str_or_dt):
         print(f"    ⚠ 时区转换失败: {str(e)[:50]}")
         return dt_str_or_dt if isinstance(dt_str_or_dt, str) else str(dt_str_or_dt)
 
+def get_link_text(link):
+    """
+    Get the stripped text of a link.
+    Uses the anchor's single string directly when possible and only walks
+    all descendants (nested span/img etc.) when that is empty.
+    """
+    return (link.string or '').strip() or link.get_text(strip=True)
+
 def extract_article_links(homepage_url, soup):
     """
     Extract news article links and titles from homepage HTML
@@ -96,24 +128,10 @@ def extract_article_links(homepage_url, soup):
     article_links = []
     base_domain = urlparse(homepage_url).netloc
     
-    # Common news link selectors (needs adjustment based on actual website)
-    # Try multiple possible selectors
-    selectors = [
-        'article a',           # Links within article tags
-        '.post a',             # Links within post class
-        '.article a',          # Links within article class
-        'h2 a', 'h3 a',        # Links within headings
-        '.entry-title a',      # Links within title class
-        '.news-item a',        # Links within news item class
-        'a[href*="/article/"]',  # Links containing /article/
-        'a[href*="/news/"]',      # Links containing /news/
-        'a[href*="/story/"]',     # Links containing /story/
-    ]
-    
     found_links = set()  # For deduplication
     
-    for selector in selectors:
-        links = soup.select(selector)
+    for selector in COMPILED_LINK_SELECTORS:
+        links = selector.select(soup)
         for link in links:
             href = link.get('href')
             if not href:
@@ -121,46 +139,49 @@ def extract_article_links(homepage_url, soup):
             
             # Convert to absolute URL
             full_url = urljoin(homepage_url, href)
-            parsed = urlparse(full_url)
             
-            # Filter conditions: only keep same-domain links, exclude homepage, category pages, etc.
-            if (parsed.netloc == base_domain and 
-                full_url not in found_links and
-                full_url != homepage_url and
-                not any(x in full_url.lower() for x in ['/category/', '/tag/', '/author/', '/page/', '/archive/'])):
-                
-                title = link.get_text(strip=True)
-                if title and len(title) > 10:  # Filter by title length
-                    found_links.add(full_url)
-                    article_links.append({
-                        'title': title,
-                        'url': full_url,
-                        'source': homepage_url
-                    })
+            # Filter conditions (cheapest checks first): skip duplicates and the homepage,
+            # only keep same-domain links, exclude category pages, etc.
+            if full_url in found_links or full_url == homepage_url:
+                continue
+            if urlparse(full_url).netloc != base_domain:
+                continue
+            if EXCLUDED_PATH_RE.search(full_url.lower()):
+                continue
+            
+            title = get_link_text(link)
+            if title and len(title) > 10:  # Filter by title length
+                found_links.add(full_url)
+                article_links.append({
+                    'title': title,
+                    'url': full_url,
+                    'source': homepage_url
+                })
     
     # If the above selectors didn't find anything, try a more generic method
     if not article_links:
         # Find all links and filter out those that might be articles
         all_links = soup.find_all('a', href=True)
+        min_url_len = len(homepage_url) + 10  # Filter by URL length
         for link in all_links:
             href = link.get('href')
             full_url = urljoin(homepage_url, href)
-            parsed = urlparse(full_url)
             
-            if (parsed.netloc == base_domain and 
-                full_url not in found_links and
-                full_url != homepage_url and
-                len(full_url) > len(homepage_url) + 10 and  # Filter by URL length
-                not any(x in full_url.lower() for x in ['/category/', '/tag/', '/author/', '/page/', '/archive/', '#'])):
-                
-                title = link.get_text(strip=True)
-                if title and len(title) > 10:
-                    found_links.add(full_url)
-                    article_links.append({
-                        'title': title,
-                        'url': full_url,
-                        'source': homepage_url
-                    })
+            if len(full_url) <= min_url_len or full_url in found_links:
+                continue
+            if urlparse(full_url).netloc != base_domain:
+                continue
+            if EXCLUDED_FALLBACK_RE.search(full_url.lower()):
+                continue
+            
+            title = get_link_text(link)
+            if title and len(title) > 10:
+                found_links.add(full_url)
+                article_links.append({
+                    'title': title,
+                    'url': full_url,
+                    'source': homepage_url
+                })
     
     # Deduplicate and limit quantity
     seen = set()
@@ -208,125 +229,132 @@ def serialize_article(article):
             result[key] = value
     return result
 
-# Main program
-print("=" * 60)
-print("开始抓取新闻...")
-print("=" * 60)
+def main():
+    """Crawl every homepage, extract articles and save them to data/news_<date>.json
+    Returns the path of the saved file.
+    """
+    print("=" * 60)
+    print("开始抓取新闻...")
+    print("=" * 60)
 
-all_articles = []
-total_links_found = 0
-total_articles_extracted = 0
+    all_articles = []
+    total_links_found = 0
+    total_articles_extracted = 0
 
-# Step 1: Extract news links from each homepage
-for homepage_url in homepage_urls:
-    print(f"\n📰 处理首页: {homepage_url}")
-    try:
-        # Get homepage HTML
-        response = requests.get(homepage_url, headers=headers, timeout=10)
-        response.raise_for_status()
+    # Step 1: Extract news links from each homepage
+    for homepage_url in homepage_urls:
+        print(f"\n📰 处理首页: {homepage_url}")
+        try:
+            # Get homepage HTML
+            response = requests.get(homepage_url, headers=headers, timeout=10)
+            response.raise_for_status()
         
-        # Parse HTML
-        soup = BeautifulSoup(response.content, 'html.parser')
+            # Parse HTML
+            soup = BeautifulSoup(response.content, 'html.parser')
         
-        # Extract news links
-        article_links = extract_article_links(homepage_url, soup)
-        total_links_found += len(article_links)
+            # Extract news links
+            article_links = extract_article_links(homepage_url, soup)
+            total_links_found += len(article_links)
         
-        print(f"  ✓ 找到 {len(article_links)} 个新闻链接")
+            print(f"  ✓ 找到 {len(article_links)} 个新闻链接")
         
-        # Step 2: Extract article content for each link
-        for i, link_info in enumerate(article_links, 1):
-            article_url = link_info['url']
-            homepage_title = link_info['title']
+            # Step 2: Extract article content for each link
+            for i, link_info in enumerate(article_links, 1):
+                article_url = link_info['url']
+                homepage_title = link_info['title']
             
-            print(f"  [{i}/{len(article_links)}] 提取: {homepage_title[:50]}...")
+                print(f"  [{i}/{len(article_links)}] 提取: {homepage_title[:50]}...")
             
-            try:
-                # Use newsplease to extract article content
-                article = NewsPlease.from_url(article_url, request_args=request_args)
+                try:
+                    # Use newsplease to extract article content
+                    article = NewsPlease.from_url(article_url, request_args=request_args)
                 
-                if article and article.title:
-                    # Serialize article data
-                    article_data = serialize_article(article)
+                    if article and article.title:
+                        # Serialize article data
+                        article_data = serialize_article(article)
                     
-                    # Add homepage information
-                    if article_data:
-                        article_data['homepage_title'] = homepage_title
-                        article_data['homepage_source'] = homepage_url
-                        # Convert extracted_at to Nigeria time
-                        article_data['extracted_at'] = convert_to_nigeria_time(datetime.now())
+                        # Add homepage information
+                        if article_data:
+                            article_data['homepage_title'] = homepage_title
+                            article_data['homepage_source'] = homepage_url
+                            # Convert extracted_at to Nigeria time
+                            article_data['extracted_at'] = convert_to_nigeria_time(datetime.now())
                     
-                    # Convert date_download to Nigeria timezone for consistency
-                    if article_data and 'date_download' in article_data:
-                        article_data['date_download'] = convert_to_nigeria_time(article_data['date_download'])
+                        # Convert date_download to Nigeria timezone for consistency
+                        if article_data and 'date_download' in article_data:
+                            article_data['date_download'] = convert_to_nigeria_time(article_data['date_download'])
                     
-                    # Convert date_publish to Nigeria timezone (assuming it's already in Nigeria time, but ensure consistency)
-                    if article_data and 'date_publish' in article_data and article_data['date_publish']:
-                        article_data['date_publish'] = convert_to_nigeria_time(article_data['date_publish'])
+                        # Convert date_publish to Nigeria timezone (assuming it's already in Nigeria time, but ensure consistency)
+                        if article_data and 'date_publish' in article_data and article_data['date_publish']:
+                            article_data['date_publish'] = convert_to_nigeria_time(article_data['date_publish'])
                     
-                    # Time filter: skip articles published more than 48 hours before download
-                    if article_data and 'date_publish' in article_data and 'date_download' in article_data:
-                        try:
-                            date_publish_str = article_data.get('date_publish')
-                            date_download_str = article_data.get('date_download')
+                        # Time filter: skip articles published more than 48 hours before download
+                        if article_data and 'date_publish' in article_data and 'date_download' in article_data:
+                            try:
+                                date_publish_str = article_data.get('date_publish')
+                                date_download_str = article_data.get('date_download')
                             
-                            # Only filter if both dates are available and not None
-                            if date_publish_str and date_download_str:
-                                # Parse datetime strings (both should now be in Nigeria timezone)
-                                date_publish_str_clean = str(date_publish_str).replace('Z', '+00:00')
-                                date_download_str_clean = str(date_download_str).replace('Z', '+00:00')
+                                # Only filter if both dates are available and not None
+                                if date_publish_str and date_download_str:
+                                    # Parse datetime strings (both should now be in Nigeria timezone)
+                                    date_publish_str_clean = str(date_publish_str).replace('Z', '+00:00')
+                                    date_download_str_clean = str(date_download_str).replace('Z', '+00:00')
                                 
-                                date_publish = datetime.fromisoformat(date_publish_str_clean)
-                                date_download = datetime.fromisoformat(date_download_str_clean)
+                                    date_publish = datetime.fromisoformat(date_publish_str_clean)
+                                    date_download = datetime.fromisoformat(date_download_str_clean)
                                 
-                                # Ensure both are timezone-aware (should be after conversion)
-                                if date_publish.tzinfo is None:
-                                    date_publish = date_publish.replace(tzinfo=NIGERIA_TZ)
-                                if date_download.tzinfo is None:
-                                    date_download = date_download.replace(tzinfo=NIGERIA_TZ)
+                                    # Ensure both are timezone-aware (should be after conversion)
+                                    if date_publish.tzinfo is None:
+                                        date_publish = date_publish.replace(tzinfo=NIGERIA_TZ)
+                                    if date_download.tzinfo is None:
+                                        date_download = date_download.replace(tzinfo=NIGERIA_TZ)
                                 
-                                # Calculate time difference
-                                time_diff = date_download - date_publish
+                                    # Calculate time difference
+                                    time_diff = date_download - date_publish
                                 
-                                # Skip if published more than 48 hours before download
-                                if time_diff > timedelta(hours=48):
-                                    print(f"    ⏭ 跳过（发布时间早于下载时间超过48小时: {time_diff.days}天{time_diff.seconds//3600}小时）")
-                                    continue
-                        except (ValueError, TypeError, AttributeError) as e:
-                            # If date parsing fails, continue with the article
-                            print(f"    ⚠ 时间解析失败，继续处理: {str(e)[:30]}")
+                                    # Skip if published more than 48 hours before download
+                                    if time_diff > timedelta(hours=48):
+                                        print(f"    ⏭ 跳过（发布时间早于下载时间超过48小时: {time_diff.days}天{time_diff.seconds//3600}小时）")
+                                        continue
+                            except (ValueError, TypeError, AttributeError) as e:
+                                # If date parsing fails, continue with the article
+                                print(f"    ⚠ 时间解析失败，继续处理: {str(e)[:30]}")
                     
-                    all_articles.append(article_data)
-                    total_articles_extracted += 1
-                    print(f"    ✓ 成功提取")
-                else:
-                    print(f"    ✗ 无法提取内容")
+                        all_articles.append(article_data)
+                        total_articles_extracted += 1
+                        print(f"    ✓ 成功提取")
+                    else:
+                        print(f"    ✗ 无法提取内容")
                 
-                # Add delay to avoid requests being too fast
-                time.sleep(1)
+                    # Add delay to avoid requests being too fast
+                    time.sleep(1)
                 
-            except Exception as e:
-                print(f"    ✗ 提取失败: {str(e)[:50]}")
-                continue
+                except Exception as e:
+                    print(f"    ✗ 提取失败: {str(e)[:50]}")
+                    continue
         
-    except Exception as e:
-        print(f"  ✗ 处理首页失败: {str(e)}")
-        continue
+        except Exception as e:
+            print(f"  ✗ 处理首页失败: {str(e)}")
+            continue
+
+    # Step 3: Save to JSON file
+    print(f"\n" + "=" * 60)
+    print(f"抓取完成！")
+    print(f"  找到链接: {total_links_found} 个")
+    print(f"  成功提取: {total_articles_extracted} 篇文章")
+    print("=" * 60)
 
-# Step 3: Save to JSON file
-print(f"\n" + "=" * 60)
-print(f"抓取完成！")
-print(f"  找到链接: {total_links_found} 个")
-print(f"  成功提取: {total_articles_extracted} 篇文章")
-print("=" * 60)
 
+    time_stamp = datetime.today().date()
+    output_dir = 'data'
+    os.makedirs(output_dir, exist_ok=True)
+    output_file = os.path.join(output_dir, f'news_{time_stamp}.json')
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(all_articles, f, ensure_ascii=False, indent=2)
 
-time_stamp = datetime.today().date()
-output_dir = 'data'
-os.makedirs(output_dir, exist_ok=True)
-output_file = os.path.join(output_dir, f'news_{time_stamp}.json')
-with open(output_file, 'w', encoding='utf-8') as f:
-    json.dump(all_articles, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ 所有文章数据已保存到 {output_file}")
+    print(f"   共 {len(all_articles)} 篇文章")
+    return output_file
 
-print(f"\n✅ 所有文章数据已保存到 {output_file}")
-print(f"   共 {len(all_articles)} 篇文章")
+if __name__ == '__main__':
+    main()
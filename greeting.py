@@ -11,29 +11,228 @@ API Key Configuration:
 """
 
 import os
+import re
+import sys
+import json
+import time
+import hashlib
+import random
+import logging
+import functools
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from ai_client import AIClient
-from config import is_available, get_config
+from config import is_available
+from utils import CACHE_DIR, atomic_open, json_dumps_pretty
 from typing import Dict, Optional, Any
 
+try:
+    from weather import fetch_weather, format_weather_summary
+except ImportError:
+    fetch_weather = format_weather_summary = None
+
+logger = logging.getLogger(__name__)
+
 # Nigeria timezone (Africa/Lagos, UTC+1)
 NIGERIA_TZ = ZoneInfo('Africa/Lagos')
 
 # Default greeting as fallback
 DEFAULT_GREETING = "你好！"
 
+# Upper bound (seconds) to wait for each AI call
+AI_CALL_TIMEOUT = 120
+
+# Common AI response prefixes to strip (after surrounding quotes/whitespace)
+GREETING_PREFIX_RE = re.compile(r'^[\s"\']*(?:问候语[:：]|生成[:：]|以下是|建议[:：]|根据当前时间)?\s*')
+ADVICE_PREFIX_RE = re.compile(r'^[\s"\']*(?:天气建议[:：]|建议[:：]|以下是|根据天气)?\s*')
+# Output token caps sized to the expected lengths (~35-char greeting, ~100-char advice);
+# a truncated response (finish_reason 'length') is retried once with double the cap
+GREETING_MAX_TOKENS = 150
+ADVICE_MAX_TOKENS = 350
+
+# Attempts per AI call; only transient errors (rate limit, 5xx, timeouts, dropped connections) are retried
+AI_MAX_ATTEMPTS = 3
+TRANSIENT_ERROR_RE = re.compile(r'\b(?:429|50[0-4])\b|rate.?limit|timed? ?out|connection', re.IGNORECASE)
+
+# Ask for greeting and weather advice in one JSON response (set GREETING_COMBINED_PROMPT=0 for two requests)
+COMBINED_PROMPT = os.getenv('GREETING_COMBINED_PROMPT', '1') != '0'
+JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+# Weather block of the greeting prompt, filled from _weather_mapping()
+WEATHER_CONTEXT_TEMPLATE = "\n".join([
+    "当前天气信息（阿布贾）：",
+    "- 温度：{temperature_c}°C{feels_like_str}",
+    "- 天气：{weather_description}",
+    "- 湿度：{humidity}%",
+    "- 风速：{wind_speed_kmh} km/h{wind_dir_str}",
+    "- 空气质量：{aqi_level} (PM2.5: {pm2_5} μg/m³)",
+    "",
+])
+
+# Status output is collected and written in one go per greeting run (set DNR_VERBOSE=0 to silence it)
+VERBOSE = os.getenv('DNR_VERBOSE', '1') != '0'
+_log_lines: list = []
+
+# Successful AI greetings generated in this process, keyed by (date, hour, weather signature)
+_greeting_cache: Dict[tuple, Dict[str, str]] = {}
+
+# Optional disk cache of AI responses shared across runs, keyed by prompt fingerprint
+# (enable with DNR_LLM_CACHE=1; entries expire after LLM_CACHE_TTL seconds, least recently used evicted)
+LLM_CACHE_ENABLED = os.getenv('DNR_LLM_CACHE') == '1'
+LLM_CACHE_DIR = os.path.join(CACHE_DIR, 'llm')  # Own subdirectory: eviction never touches other caches
+LLM_CACHE_TTL = 3600
+LLM_CACHE_MAX_FILES = 256
+LLM_CACHE_FILE_RE = re.compile(r'llm_[0-9a-f]{64}\.json')
+
+# Possible response fields carrying the generated text, in priority order
+TEXT_KEYS = ('text', 'content', 'message')
+
+# Leading/trailing quotes and whitespace
+TRIM_CHARS = ' \t\r\n\u3000"\''
+
+def _log(message: str):
+    """Queue a status line (written by _flush_log)"""
+    if VERBOSE:
+        _log_lines.append(message)
+
+def _flush_log():
+    """Write all queued status lines with a single stdout write"""
+    if _log_lines:
+        sys.stdout.write("\n".join(_log_lines) + "\n")
+        sys.stdout.flush()
+        _log_lines.clear()
+
 def get_current_time_info():
-    """Get current time information in Nigeria timezone"""
+    """Get current time information in Nigeria timezone (cached per minute)"""
+    return _compute_time_info(int(time.time() // 60))
+
+@functools.lru_cache(maxsize=1)
+def _compute_time_info(minute_bucket: int) -> Dict[str, Any]:
+    """Build time information for the given minute (timestamp // 60)"""
     now_nigeria = datetime.now(NIGERIA_TZ)
+    date_str, time_str, weekday = now_nigeria.strftime('%Y-%m-%d|%H:%M:%S|%A').split('|')
     return {
         'hour': now_nigeria.hour,
         'minute': now_nigeria.minute,
-        'date': now_nigeria.strftime('%Y-%m-%d'),
-        'time': now_nigeria.strftime('%H:%M:%S'),
-        'weekday': now_nigeria.strftime('%A')
+        'date': date_str,
+        'time': time_str,
+        'weekday': weekday
     }
 
+# Provider availability is fixed for the lifetime of the process;
+# call .cache_clear() on both if API keys are changed at runtime
+_is_available_cached = functools.lru_cache(maxsize=8)(is_available)
+
+@functools.lru_cache(maxsize=1)
+def _available_providers_cached(ai_config) -> tuple:
+    """Get available AI providers from the given AIConfig (cached)"""
+    return tuple(ai_config.get_available_providers())
+
+def _extract_text(result: Dict[str, Any]):
+    """Get the first non-empty text field from an AI response"""
+    return next((result[key] for key in TEXT_KEYS if result.get(key)), None)
+
+def _generate_with_retry(ai_client: AIClient, prompt: str, **kwargs) -> Optional[Dict[str, Any]]:
+    """Call ai_client.generate_content, retrying transient errors with jittered exponential backoff"""
+    expanded = False
+    for attempt in range(AI_MAX_ATTEMPTS):
+        result = ai_client.generate_content(prompt, **kwargs)
+        error = result.get('error') if result else None
+        if result and not error and result.get('finish_reason') == 'length' and not expanded and 'max_tokens' in kwargs:
+            kwargs['max_tokens'] *= 2
+            expanded = True
+            _log(f"  ⚠️  AI响应被截断，将 max_tokens 提高到 {kwargs['max_tokens']} 后重试")
+            result = ai_client.generate_content(prompt, **kwargs)
+            error = result.get('error') if result else None
+        if not error or attempt == AI_MAX_ATTEMPTS - 1 or not TRANSIENT_ERROR_RE.search(str(error)):
+            return result
+        delay = 0.5 * (2 ** attempt) + random.uniform(0, 0.25)
+        _log(f"  ⚠️  AI调用暂时失败，{delay:.1f}秒后重试（第{attempt + 1}次）: {str(error)[:50]}")
+        time.sleep(delay)
+    return result
+
+def _llm_cache_path(ai_client: AIClient, prompt: str, kwargs: Dict[str, Any]) -> str:
+    """Cache file for a request: sha256 of provider, model, prompt and sampling parameters"""
+    fingerprint = "|".join([
+        ai_client.provider, str(ai_client.model_name), prompt,
+        str(kwargs.get('temperature')), str(kwargs.get('max_tokens')),
+    ])
+    return os.path.join(LLM_CACHE_DIR, f"llm_{hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()}.json")
+
+def _evict_llm_cache():
+    """Keep at most LLM_CACHE_MAX_FILES entries, dropping the least recently used
+    Only files named like _llm_cache_path() entries are counted or removed.
+    """
+    entries = [e for e in os.scandir(LLM_CACHE_DIR) if LLM_CACHE_FILE_RE.fullmatch(e.name)]
+    if len(entries) <= LLM_CACHE_MAX_FILES:
+        return
+    entries.sort(key=lambda e: e.stat().st_mtime)
+    for entry in entries[:len(entries) - LLM_CACHE_MAX_FILES]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+def _cached_generate(ai_client: AIClient, prompt: str, **kwargs) -> Optional[Dict[str, Any]]:
+    """_generate_with_retry backed by the optional on-disk response cache"""
+    if not LLM_CACHE_ENABLED:
+        return _generate_with_retry(ai_client, prompt, **kwargs)
+    
+    path = _llm_cache_path(ai_client, prompt, kwargs)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+        if time.time() - entry['created_at'] < LLM_CACHE_TTL:
+            os.utime(path)  # mark as recently used
+            _log("  ✓ 命中AI响应缓存")
+            return entry['result']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    
+    result = _generate_with_retry(ai_client, prompt, **kwargs)
+    if result and not result.get('error') and _extract_text(result):
+        try:
+            os.makedirs(LLM_CACHE_DIR, exist_ok=True)
+            with atomic_open(path, 'w', encoding='utf-8') as f:
+                json.dump({'created_at': time.time(), 'result': result}, f, ensure_ascii=False, default=str)
+            _evict_llm_cache()
+        except OSError as e:
+            _log(f"  ⚠️  写入AI响应缓存失败: {str(e)[:50]}")
+    return result
+
+@functools.lru_cache(maxsize=4)
+def _get_ai_client(provider: str) -> AIClient:
+    """Shared AIClient per provider, so its HTTP connections are reused across greeting runs"""
+    return AIClient(provider)
+
+def _clean_ai_text(text: str, prefix_re: re.Pattern) -> str:
+    """Strip quotes, whitespace and a known response prefix from AI output"""
+    return prefix_re.sub('', text, count=1).strip(TRIM_CHARS)
+
+def _weather_signature(weather_info: Optional[Dict[str, Any]]) -> str:
+    """Short stable hash of the weather data (part of the greeting cache key)"""
+    if not weather_info:
+        return ''
+    payload = json.dumps(weather_info['data'], sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=8).hexdigest()
+
+def _remember_greeting(cache_key: tuple, result: Dict[str, str]) -> Dict[str, str]:
+    """Store a successful AI greeting and return a copy for the caller"""
+    _greeting_cache[cache_key] = result
+    return dict(result)
+
+def _fallback(weather_info: Optional[Dict[str, Any]]):
+    """Default greeting result (dict with weather summary if available, else plain string)"""
+    if weather_info:
+        return {
+            'greeting': DEFAULT_GREETING,
+            'weather_summary': weather_info['summary'],
+            'weather_advice': ''
+        }
+    return DEFAULT_GREETING
+
 def get_weather_info() -> Optional[Dict[str, Any]]:
     """
     Fetch weather information for Nigeria (Abuja)
@@ -41,19 +240,133 @@ def get_weather_info() -> Optional[Dict[str, Any]]:
     Returns:
         Dictionary with weather data or None if unavailable
     """
+    if fetch_weather is None:
+        _log("  ⚠️  天气模块未找到，跳过天气信息")
+        return None
+    
     try:
-        from weather import fetch_weather, format_weather_summary
         weather = fetch_weather()
         weather_summary = format_weather_summary(weather)
         return {
             'data': weather,
             'summary': weather_summary
         }
-    except ImportError:
-        print("  ⚠️  天气模块未找到，跳过天气信息")
-        return None
     except Exception as e:
-        print(f"  ⚠️  获取天气信息失败: {str(e)[:50]}，跳过天气信息")
+        _log(f"  ⚠️  获取天气信息失败: {str(e)[:50]}，跳过天气信息")
+        return None
+
+def _weather_mapping(weather_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Weather fields for prompt formatting; missing or empty values read as '未知'"""
+    mapping = defaultdict(lambda: '未知', {k: v for k, v in weather_data.items() if v is not None and v != ''})
+    feels_like = weather_data.get('feels_like_c')
+    wind_dir = weather_data.get('wind_direction')
+    aq = weather_data.get('air_quality') or {}
+    mapping['feels_like_str'] = f" (体感 {feels_like}°C)" if feels_like else ""
+    mapping['wind_dir_str'] = f" {wind_dir}" if wind_dir else ""
+    mapping['aqi_level'] = aq.get('aqi_level') or '未知'
+    mapping['pm2_5'] = aq.get('pm2_5', 'N/A')
+    return mapping
+
+def build_greeting_prompt(time_info: Dict[str, Any], weather_info: Optional[Dict[str, Any]]) -> str:
+    """Build the greeting prompt from time and (optional) weather information"""
+    # Build weather context for prompt
+    weather_context = ""
+    if weather_info:
+        weather_context = WEATHER_CONTEXT_TEMPLATE.format_map(_weather_mapping(weather_info['data']))
+    
+    # Create prompt with time and weather information
+    # (built from unindented lines so no leading whitespace is sent as prompt tokens)
+    prompt = "\n".join([
+        "请根据当前时间和天气信息生成一句简短、幽默、阳光的问候语，用于每日新闻报告的邮件开头。",
+        "",
+        "当前时间信息：",
+        f"- 日期：{time_info['date']}",
+        f"- 时间：{time_info['time']} (尼日利亚时间)",
+        f"- 星期：{time_info['weekday']}",
+        f"- 小时：{time_info['hour']}点",
+        weather_context,
+        "要求：",
+        "1. 简短精炼，不超过35个字",
+        "2. 幽默有趣，让人心情愉悦",
+        "3. 阳光积极，充满正能量",
+        f"4. 根据当前时间（{time_info['hour']}点）自然判断是上午、下午还是晚上，并生成相应的问候语",
+        "5. 可以适当结合天气情况，但不要过于详细",
+        "6. 不要包含emoji或特殊符号",
+        "7. 直接输出问候语，不要其他解释或引号",
+        "8. 注意添加适当的标点符号，例如逗号、句号、感叹号。",
+        "9. 偶尔可以引用书籍中的金句或者名人名言。",
+        "",
+        "请生成一句新的问候语（每次都要不同，要有创意）：",
+    ])
+    return prompt
+
+def build_weather_advice_prompt(weather_data: Dict[str, Any], time_info: Dict[str, Any]) -> str:
+    """Build the weather advice prompt"""
+    weather = _weather_mapping(weather_data)
+    
+    prompt = "\n".join([
+        "根据以下天气信息，生成一份简短、实用、积极的天气建议，包括：",
+        "1. 穿衣建议（根据温度）",
+        "2. 注意事项（如防晒、防雨、防风等）",
+        "3. 保持心情愉快的建议",
+        "4. 今天适合做的事情",
+        "",
+        "当前天气信息（尼日利亚阿布贾）：",
+        f"- 温度：{weather['temperature_c']}°C",
+        f"- 天气：{weather['weather_description']}",
+        f"- 湿度：{weather['humidity']}%",
+        f"- 风速：{weather['wind_speed_kmh']} km/h",
+        f"- 空气质量：{weather['aqi_level']}",
+        f"- 当前时间：{time_info['hour']}点",
+        "",
+        "要求：",
+        "1. 简短精炼，总共不超过100个字",
+        "2. 积极正面，让人心情愉悦",
+        "3. 实用具体，给出可操作的建议",
+        "4. 可以适当幽默，但不要过度",
+        "5. 直接输出建议，不要其他解释或引号",
+        "6. 使用自然的中文表达，可以分段但不要用列表符号",
+        "",
+        "请生成天气建议：",
+    ])
+    return prompt
+
+def generate_combined_greeting(ai_client: AIClient, greeting_prompt: str, advice_prompt: str) -> Optional[Dict[str, str]]:
+    """
+    Generate greeting and weather advice in a single AI request
+    
+    Returns:
+        {'greeting': str, 'advice': str}, or None if the response is not valid JSON
+        (caller falls back to separate requests)
+    """
+    prompt = "\n".join([
+        "请同时完成以下两个任务，只输出一个JSON对象，格式为：",
+        '{"greeting": "问候语", "advice": "天气建议"}',
+        "不要输出JSON以外的任何内容。",
+        "",
+        "任务一（greeting）：",
+        greeting_prompt,
+        "",
+        "任务二（advice）：",
+        advice_prompt,
+    ])
+    try:
+        result = _cached_generate(ai_client, prompt, temperature=0.6, max_tokens=GREETING_MAX_TOKENS + ADVICE_MAX_TOKENS)
+        text = _extract_text(result) if result else None
+        match = JSON_OBJECT_RE.search(str(text)) if text else None
+        if not match:
+            return None
+        data = json.loads(match.group(0))
+        greeting = _clean_ai_text(str(data.get('greeting') or ''), GREETING_PREFIX_RE)
+        advice = _clean_ai_text(str(data.get('advice') or ''), ADVICE_PREFIX_RE)
+        if not greeting:
+            return None
+        _log(f"  ✓ AI生成问候语成功: {greeting[:30]}...")
+        if advice:
+            _log(f"  ✓ AI生成天气建议成功")
+        return {'greeting': greeting, 'advice': advice}
+    except (ValueError, AttributeError) as e:
+        _log(f"  ⚠️  解析合并响应失败: {str(e)[:50]}")
         return None
 
 def generate_greeting(use_ai=True, include_weather=True):
@@ -73,23 +386,30 @@ def generate_greeting(use_ai=True, include_weather=True):
         }
         Or if use_ai=False: just returns the greeting string
     """
+    try:
+        return _generate_greeting(use_ai, include_weather)
+    finally:
+        _flush_log()
+
+def _generate_greeting(use_ai: bool, include_weather: bool):
+    """Greeting generation body (status lines go through _log)"""
     time_info = get_current_time_info()
     
     # Get weather information
     weather_info = None
     if include_weather:
-        print("  🌤️  正在获取天气信息...")
+        _log("  🌤️  正在获取天气信息...")
         weather_info = get_weather_info()
     
     # If AI is not requested, return default greeting
     if not use_ai:
-        if weather_info:
-            return {
-                'greeting': DEFAULT_GREETING,
-                'weather_summary': weather_info['summary'],
-                'weather_advice': ''
-            }
-        return DEFAULT_GREETING
+        return _fallback(weather_info)
+    
+    # Reuse a greeting already generated in this process for the same hour and weather
+    cache_key = (time_info['date'], time_info['hour'], _weather_signature(weather_info))
+    if cache_key in _greeting_cache:
+        _log("  ✓ 使用本次运行中已生成的问候语")
+        return dict(_greeting_cache[cache_key])
     
     # Try to generate greeting using AI
     try:
@@ -97,127 +417,78 @@ def generate_greeting(use_ai=True, include_weather=True):
         ai_provider = 'zhipu'
         
         # Check if zhipu is available
-        if not is_available(ai_provider):
-            # Check why zhipu is not available
-            try:
-                from config import config
-                zhipu_config = config.configs.get('zhipu', {})
-                if not zhipu_config.get('enabled', False):
-                    print(f"  ⚠️  zhipu未启用")
-                elif not zhipu_config.get('api_key'):
-                    print(f"  ⚠️  zhipu API key未配置")
-                    print(f"     本地调试：请设置环境变量 ZHIPU_API_KEY")
-                    print(f"     示例：export ZHIPU_API_KEY='your-api-key'")
-                    print(f"     GitHub Actions：会在 secrets 中自动配置")
-                else:
-                    print(f"  ⚠️  zhipu配置存在问题（API key已设置但可能无效）")
-            except Exception as e:
-                print(f"  ⚠️  检查zhipu配置时出错: {str(e)[:50]}")
+        if not _is_available_cached(ai_provider):
+            from config import config as ai_config
+            
+            # Check why zhipu is not available (diagnostics only, skipped when output is silenced)
+            if VERBOSE:
+                try:
+                    zhipu_config = ai_config.configs.get('zhipu', {})
+                    if not zhipu_config.get('enabled', False):
+                        _log(f"  ⚠️  zhipu未启用")
+                    elif not zhipu_config.get('api_key'):
+                        _log(f"  ⚠️  zhipu API key未配置")
+                        _log(f"     本地调试：请设置环境变量 ZHIPU_API_KEY")
+                        _log(f"     示例：export ZHIPU_API_KEY='your-api-key'")
+                        _log(f"     GitHub Actions：会在 secrets 中自动配置")
+                    else:
+                        _log(f"  ⚠️  zhipu配置存在问题（API key已设置但可能无效）")
+                except Exception as e:
+                    _log(f"  ⚠️  检查zhipu配置时出错: {str(e)[:50]}")
             
             # Fallback: try to find any available provider
             try:
-                from config import config
-                available = config.get_available_providers()
+                available = _available_providers_cached(ai_config)
                 if available:
                     ai_provider = available[0]
-                    print(f"  ⚠️  zhipu不可用，回退到可用的AI提供商: {ai_provider}")
+                    _log(f"  ⚠️  zhipu不可用，回退到可用的AI提供商: {ai_provider}")
                 else:
-                    print("  ⚠️  没有可用的AI提供商，使用默认问候语")
-                    if weather_info:
-                        return {
-                            'greeting': DEFAULT_GREETING,
-                            'weather_summary': weather_info['summary'],
-                            'weather_advice': ''
-                        }
-                    return DEFAULT_GREETING
+                    _log("  ⚠️  没有可用的AI提供商，使用默认问候语")
+                    return _fallback(weather_info)
             except Exception as e:
-                print(f"  ⚠️  无法检查AI提供商: {str(e)[:50]}，使用默认问候语")
-                if weather_info:
-                    return {
-                        'greeting': DEFAULT_GREETING,
-                        'weather_summary': weather_info['summary'],
-                        'weather_advice': ''
-                    }
-                return DEFAULT_GREETING
+                _log(f"  ⚠️  无法检查AI提供商: {str(e)[:50]}，使用默认问候语")
+                return _fallback(weather_info)
         
         # Initialize AI client
-        ai_client = AIClient(ai_provider)
+        ai_client = _get_ai_client(ai_provider)
         
-        # Build weather context for prompt
-        weather_context = ""
-        if weather_info:
-            weather_data = weather_info['data']
-            temp_c = weather_data.get('temperature_c') or '未知'
-            feels_like = weather_data.get('feels_like_c')
-            feels_like_str = f" (体感 {feels_like}°C)" if feels_like else ""
-            weather_desc = weather_data.get('weather_description', '未知') or '未知'
-            humidity = weather_data.get('humidity') or '未知'
-            wind_speed = weather_data.get('wind_speed_kmh') or '未知'
-            wind_dir = weather_data.get('wind_direction', '') or ''
-            wind_dir_str = f" {wind_dir}" if wind_dir else ""
-            aq = weather_data.get('air_quality', {})
-            aqi_level = aq.get('aqi_level', '未知') if aq else '未知'
-            pm25 = aq.get('pm2_5', 'N/A') if aq else 'N/A'
-            
-            weather_context = f"""
-                            当前天气信息（阿布贾）：
-                            - 温度：{temp_c}°C{feels_like_str}
-                            - 天气：{weather_desc}
-                            - 湿度：{humidity}%
-                            - 风速：{wind_speed} km/h{wind_dir_str}
-                            - 空气质量：{aqi_level} (PM2.5: {pm25} μg/m³)
-                            """
+        # Build prompts up front (both depend only on time and weather information)
+        prompt = build_greeting_prompt(time_info, weather_info)
         
-        # Create prompt with time and weather information
-        prompt = f"""请根据当前时间和天气信息生成一句简短、幽默、阳光的问候语，用于每日新闻报告的邮件开头。
-
-                当前时间信息：
-                - 日期：{time_info['date']}
-                - 时间：{time_info['time']} (尼日利亚时间)
-                - 星期：{time_info['weekday']}
-                - 小时：{time_info['hour']}点
-                {weather_context}
-                要求：
-                1. 简短精炼，不超过35个字
-                2. 幽默有趣，让人心情愉悦
-                3. 阳光积极，充满正能量
-                4. 根据当前时间（{time_info['hour']}点）自然判断是上午、下午还是晚上，并生成相应的问候语
-                5. 可以适当结合天气情况，但不要过于详细
-                6. 不要包含emoji或特殊符号
-                7. 直接输出问候语，不要其他解释或引号
-                8. 注意添加适当的标点符号，例如逗号、句号、感叹号。
-                9. 偶尔可以引用书籍中的金句或者名人名言。
-
-                请生成一句新的问候语（每次都要不同，要有创意）："""
+        # Preferred path: one request returning both greeting and advice as JSON
+        if weather_info and COMBINED_PROMPT:
+            advice_prompt = build_weather_advice_prompt(weather_info['data'], time_info)
+            _log(f"  🤖 使用AI生成问候语和天气建议（当前时间：{time_info['time']}，提供商：{ai_provider}）...")
+            combined = generate_combined_greeting(ai_client, prompt, advice_prompt)
+            if combined:
+                return _remember_greeting(cache_key, {
+                    'greeting': combined['greeting'],
+                    'weather_summary': weather_info['summary'],
+                    'weather_advice': combined['advice']
+                })
+            _log(f"  ⚠️  合并请求未返回有效JSON，改为分别生成问候语和天气建议")
         
-        # Generate greeting
-        print(f"  🤖 使用AI生成问候语（当前时间：{time_info['time']}，提供商：{ai_provider}）...")
-        # Increase max_tokens to avoid truncation (100 was too small)
-        result = ai_client.generate_content(prompt, temperature=0.6, max_tokens=1000)
+        # Generate greeting and weather advice concurrently (two independent requests)
+        _log(f"  🤖 使用AI生成问候语（当前时间：{time_info['time']}，提供商：{ai_provider}）...")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            greeting_future = executor.submit(_cached_generate, ai_client, prompt, temperature=0.6, max_tokens=GREETING_MAX_TOKENS)
+            advice_future = None
+            if weather_info:
+                advice_future = executor.submit(generate_weather_advice, ai_client, weather_info['data'], time_info)
+            result = greeting_future.result(timeout=AI_CALL_TIMEOUT)
+            weather_advice = advice_future.result(timeout=AI_CALL_TIMEOUT) if advice_future else ""
         
         # Debug: print result structure for troubleshooting
         if result:
             # Try different possible field names for the response text
-            greeting_text = result.get('text') or result.get('content') or result.get('message')
+            greeting_text = _extract_text(result)
             
             if greeting_text:
-                greeting = str(greeting_text).strip()
-                # Clean up the greeting (remove quotes, extra spaces, etc.)
-                greeting = greeting.strip('"').strip("'").strip()
-                # Remove any leading/trailing punctuation that might be from AI response
-                # Remove common AI response prefixes
-                prefixes_to_remove = ['问候语：', '问候语:', '生成：', '生成:', '以下是', '建议：', '建议:', '根据当前时间']
-                for prefix in prefixes_to_remove:
-                    if greeting.startswith(prefix):
-                        greeting = greeting[len(prefix):].strip()
+                # Clean up the greeting (remove quotes, extra spaces and common AI response prefixes)
+                greeting = _clean_ai_text(str(greeting_text), GREETING_PREFIX_RE)
                 
                 if greeting and len(greeting) > 0:
-                    print(f"  ✓ AI生成问候语成功: {greeting[:30]}...")
-                    
-                    # Generate weather-related advice if weather info is available
-                    weather_advice = ""
-                    if weather_info:
-                        weather_advice = generate_weather_advice(ai_client, weather_info['data'], time_info)
+                    _log(f"  ✓ AI生成问候语成功: {greeting[:30]}...")
                     
                     # Return structured result
                     result_dict = {
@@ -225,53 +496,35 @@ def generate_greeting(use_ai=True, include_weather=True):
                         'weather_summary': weather_info['summary'] if weather_info else '',
                         'weather_advice': weather_advice
                     }
-                    return result_dict
+                    return _remember_greeting(cache_key, result_dict)
             
             # If no text found, show debug information
-            print(f"  🔍 调试信息 - 返回结果键: {list(result.keys())}")
-            print(f"  🔍 调试信息 - 完整返回结果: {result}")
+            _log(f"  🔍 调试信息 - 返回结果键: {list(result.keys())}")
+            _log(f"  🔍 调试信息 - 完整返回结果: {result}")
             
             # Check for error in result
             error_msg = result.get('error') or result.get('message') or ''
             if error_msg:
-                print(f"  ⚠️  AI返回结果中没有文本内容")
-                print(f"     错误信息: {error_msg[:200]}")
+                _log(f"  ⚠️  AI返回结果中没有文本内容")
+                _log(f"     错误信息: {error_msg[:200]}")
             else:
-                print(f"  ⚠️  AI返回结果中没有文本内容")
+                _log(f"  ⚠️  AI返回结果中没有文本内容")
         else:
-            print(f"  ⚠️  AI返回结果为空（result is None）")
+            _log(f"  ⚠️  AI返回结果为空（result is None）")
         
         # If AI generation failed, use default
-        print(f"  ⚠️  AI生成问候语失败，使用默认问候语")
-        if weather_info:
-            return {
-                'greeting': DEFAULT_GREETING,
-                'weather_summary': weather_info['summary'],
-                'weather_advice': ''
-            }
-        return DEFAULT_GREETING
+        _log(f"  ⚠️  AI生成问候语失败，使用默认问候语")
+        return _fallback(weather_info)
         
     except ImportError as e:
-        print(f"  ⚠️  AI客户端导入失败: {str(e)}，使用默认问候语")
-        if weather_info:
-            return {
-                'greeting': DEFAULT_GREETING,
-                'weather_summary': weather_info['summary'],
-                'weather_advice': ''
-            }
-        return DEFAULT_GREETING
+        _log(f"  ⚠️  AI客户端导入失败: {str(e)}，使用默认问候语")
+        return _fallback(weather_info)
     except Exception as e:
-        import traceback
-        print(f"  ⚠️  生成AI问候语时出错: {str(e)}")
-        print(f"  错误详情: {traceback.format_exc()[:200]}")
-        print(f"  使用默认问候语")
-        if weather_info:
-            return {
-                'greeting': DEFAULT_GREETING,
-                'weather_summary': weather_info['summary'],
-                'weather_advice': ''
-            }
-        return DEFAULT_GREETING
+        _log(f"  ⚠️  生成AI问候语时出错: {str(e)}")
+        # Traceback is only formatted if DEBUG logging is enabled
+        logger.debug("生成AI问候语时出错", exc_info=True)
+        _log(f"  使用默认问候语")
+        return _fallback(weather_info)
 
 def generate_weather_advice(ai_client: AIClient, weather_data: Dict[str, Any], time_info: Dict[str, Any]) -> str:
     """
@@ -286,66 +539,31 @@ def generate_weather_advice(ai_client: AIClient, weather_data: Dict[str, Any], t
         String with weather-related advice
     """
     try:
-        temp = weather_data.get('temperature_c') or '未知'
-        weather_desc = weather_data.get('weather_description', '') or '未知'
-        humidity = weather_data.get('humidity') or '未知'
-        wind_speed = weather_data.get('wind_speed_kmh') or '未知'
-        aq = weather_data.get('air_quality', {})
-        aqi_level = aq.get('aqi_level', '未知') if aq else '未知'
-        
-        prompt = f"""根据以下天气信息，生成一份简短、实用、积极的天气建议，包括：
-                1. 穿衣建议（根据温度）
-                2. 注意事项（如防晒、防雨、防风等）
-                3. 保持心情愉快的建议
-                4. 今天适合做的事情
-
-                当前天气信息（尼日利亚阿布贾）：
-                - 温度：{temp}°C
-                - 天气：{weather_desc}
-                - 湿度：{humidity}%
-                - 风速：{wind_speed} km/h
-                - 空气质量：{aqi_level}
-                - 当前时间：{time_info['hour']}点
-
-                要求：
-                1. 简短精炼，总共不超过100个字
-                2. 积极正面，让人心情愉悦
-                3. 实用具体，给出可操作的建议
-                4. 可以适当幽默，但不要过度
-                5. 直接输出建议，不要其他解释或引号
-                6. 使用自然的中文表达，可以分段但不要用列表符号
-
-                请生成天气建议："""
+        prompt = build_weather_advice_prompt(weather_data, time_info)
         
-        print(f"  🤖 使用AI生成天气建议...")
-        result = ai_client.generate_content(prompt, temperature=0.7, max_tokens=300)
+        _log(f"  🤖 使用AI生成天气建议...")
+        result = _cached_generate(ai_client, prompt, temperature=0.7, max_tokens=ADVICE_MAX_TOKENS)
         
         if result:
-            advice_text = result.get('text') or result.get('content') or result.get('message')
+            advice_text = _extract_text(result)
             if advice_text:
-                advice = str(advice_text).strip()
                 # Clean up
-                advice = advice.strip('"').strip("'").strip()
-                prefixes_to_remove = ['建议：', '建议:', '天气建议：', '天气建议:', '以下是', '根据天气']
-                for prefix in prefixes_to_remove:
-                    if advice.startswith(prefix):
-                        advice = advice[len(prefix):].strip()
+                advice = _clean_ai_text(str(advice_text), ADVICE_PREFIX_RE)
                 
                 if advice and len(advice) > 0:
-                    print(f"  ✓ AI生成天气建议成功")
+                    _log(f"  ✓ AI生成天气建议成功")
                     return advice
         
-        print(f"  ⚠️  AI生成天气建议失败")
+        _log(f"  ⚠️  AI生成天气建议失败")
         return ""
         
     except Exception as e:
-        print(f"  ⚠️  生成天气建议时出错: {str(e)[:50]}")
+        _log(f"  ⚠️  生成天气建议时出错: {str(e)[:50]}")
         return ""
 
 def main():
     """Main function for command-line usage"""
-    import sys
-    import json
+    logging.basicConfig(level=logging.INFO, format='  %(levelname)s %(name)s: %(message)s')
     
     # Check if --no-ai flag is provided
     use_ai = '--no-ai' not in sys.argv
@@ -365,7 +583,7 @@ def main():
             print(f"\n天气建议：\n{result['weather_advice']}")
         print("\n" + "=" * 60)
         print("\n完整JSON数据：")
-        print(json.dumps(result, indent=2, ensure_ascii=False))
+        print(json_dumps_pretty(result))
     else:
         print(result)
     
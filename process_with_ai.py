@@ -1,528 +1,193 @@
+import io
+import gzip
+import shutil
 import json
+import mmap
 import os
+import queue
+import random
+import re
+import string
+import sys
+import logging
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterator, Optional, Tuple
 import time
+import atexit
 import hashlib
+import functools
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Import configuration and AI client
 from config import config, get_config, is_available, set_provider
 from ai_client import AIClient
+from utils import atomic_open, json_dumps, json_loads, orjson
+
+# Optional: faster non-cryptographic hashes for article IDs
+try:
+    from blake3 import blake3
+except ImportError:
+    blake3 = None
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
 
 # Configuration
 PROMPT_TEMPLATE_FILE = os.getenv('PROMPT_TEMPLATE_FILE', 'prompt_template.txt')
+# Set PROMPT_TEMPLATE_RELOAD=1 to re-read the prompt template for every article
+PROMPT_TEMPLATE_RELOAD = os.getenv('PROMPT_TEMPLATE_RELOAD') == '1'
 DATA_DIR = 'data'
 REPORT_DIR = 'report'
 
 # Get AI provider from environment variable or config file
 AI_PROVIDER = os.getenv('AI_PROVIDER', 'gemini').lower()
 
-def load_prompt_template() -> str:
-    """Load prompt template file
-    Priority: environment variable PROMPT_TEMPLATE > file prompt_template.txt > default template
-    """
-    # Priority: read from environment variable (for GitHub Actions, etc.)
-    prompt_from_env = os.getenv('PROMPT_TEMPLATE')
-    if prompt_from_env:
-        print("✓ 从环境变量加载 prompt")
-        return prompt_from_env.strip()
-    
-    # If environment variable doesn't exist, try reading from file
-    try:
-        if os.path.exists(PROMPT_TEMPLATE_FILE):
-            with open(PROMPT_TEMPLATE_FILE, 'r', encoding='utf-8') as f:
-                print("✓ 从文件加载 prompt")
-                return f.read().strip()
-        else:
-            # If file doesn't exist, return default template
-            print(f"⚠️  Prompt模板文件不存在: {PROMPT_TEMPLATE_FILE}，使用默认模板")
-            return """请你将以下新闻翻译为中文。"""
-    except Exception as e:
-        print(f"⚠️  加载prompt模板失败: {e}，使用默认模板")
-        return """请你将以下新闻翻译为中文。"""
+# Article ID hash: blake3 > xxhash > md5 (ARTICLE_ID_HASH=md5 keeps IDs compatible with older caches)
+ARTICLE_ID_HASH = os.getenv('ARTICLE_ID_HASH', '').lower()
 
-def process_article_with_ai(ai_client: AIClient, article: Dict) -> Optional[Dict]:
-    """
-    Process a single article with AI:
-    1. Filter low-quality or irrelevant articles
-    2. Extract key information
-    3. Translate to Chinese
-    """
-    if not ai_client:
-        return None
-    
-    # Prepare article content
-    title = article.get('title', '')
-    description = article.get('description', '')
-    maintext = article.get('maintext', '')
-    authors = article.get('authors', [])
-    date_publish = article.get('date_publish', '')
-    source = article.get('source_domain', '')
-    
-    # If main text is too short, might not be a complete article
-    # But still process it, just mark it as potentially incomplete
-    if not maintext or len(maintext) < 100:
-        print(f"  ⚠️  文章内容过短（{len(maintext) if maintext else 0} 字符），可能不完整")
-        # Still process it, but will be marked as invalid if AI confirms
-    
-    # Limit main text length (to avoid token limits)
-    maintext_preview = maintext[:3000] if len(maintext) > 3000 else maintext
-    if len(maintext) > 3000:
-        maintext_preview += "\n\n[文章内容较长，已截断]"
-    
-    # Load and format prompt template
-    prompt_template = load_prompt_template()
-    prompt = prompt_template.format(
-        title=title,
-        description=description,
-        authors=', '.join(authors) if authors else '未知',
-        date_publish=date_publish,
-        source=source,
-        maintext_preview=maintext_preview
-    )
+# Main text sent to the AI is truncated to this many characters
+PREVIEW_LIMIT = 3000
+PREVIEW_TRUNC_MARK = "\n\n[文章内容较长，已截断]"
+# Articles with less main text than this are marked invalid without calling the AI (0 disables)
+MIN_MAINTEXT_LENGTH = max(0, int(os.getenv('MIN_MAINTEXT_LENGTH', '100')))
 
-    try:
-        # Use unified AI client interface
-        response = ai_client.generate_content(prompt)
-        
-        # Check for errors
-        if 'error' in response:
-            error = response['error']
-            if '安全过滤器' in error or 'SAFETY' in str(response.get('finish_reason', '')):
-                print(f"  ⚠️  内容被安全过滤器阻止")
-                # Return basic data
-                return {
-                    "original": {
-                        "title": title,
-                        "description": description,
-                        "maintext": maintext,
-                        "authors": authors,
-                        "date_publish": date_publish,
-                        "source_domain": source,
-                        "url": article.get('url', ''),
-                        "homepage_source": article.get('homepage_source', ''),
-                    },
-                    "processed": {
-                        "is_valid": True,
-                        "category": "其他",
-                        "key_points": [],
-                        "title_zh": "",
-                        "description_zh": "",
-                        "summary_zh": "内容被安全过滤器阻止，无法进行AI处理",
-                        "maintext_zh": "",
-                    },
-                    "metadata": {
-                        "processed_at": datetime.now().isoformat(),
-                        "source": f"blocked_by_safety_filter_{ai_client.provider}"
-                    }
-                }
-            else:
-                print(f"  ⚠️  AI处理失败: {error}")
-                # Return article with original content, marked as processing failed
-                return {
-                    "original": {
-                        "title": title,
-                        "description": description,
-                        "maintext": maintext,
-                        "authors": authors,
-                        "date_publish": date_publish,
-                        "source_domain": source,
-                        "url": article.get('url', ''),
-                        "homepage_source": article.get('homepage_source', ''),
-                    },
-                    "processed": {
-                        "is_valid": True,  # Keep as valid to preserve content
-                        "category": "其他",
-                        "key_points": [],
-                        "title_zh": title,  # Use original title as fallback
-                        "description_zh": description or "",  # Use original description as fallback
-                        "summary_zh": f"AI处理失败: {error}",
-                        "maintext_zh": maintext[:500] if maintext else "",  # Preserve original content (truncated)
-                    },
-                    "metadata": {
-                        "processed_at": datetime.now().isoformat(),
-                        "source": f"error_{ai_client.provider}",
-                        "error": error
-                    }
-                }
-        
-        result_text = response.get('text', '')
-        if not result_text:
-            print(f"  ⚠️  响应中没有文本内容，保留原始内容")
-            # Return article with original content
-            return {
-                "original": {
-                    "title": title,
-                    "description": description,
-                    "maintext": maintext,
-                    "authors": authors,
-                    "date_publish": date_publish,
-                    "source_domain": source,
-                    "url": article.get('url', ''),
-                    "homepage_source": article.get('homepage_source', ''),
-                },
-                "processed": {
-                    "is_valid": True,
-                    "category": "其他",
-                    "key_points": [],
-                    "title_zh": title,
-                    "description_zh": description or "",
-                    "summary_zh": "AI响应为空，保留原始内容",
-                    "maintext_zh": maintext[:1000] if maintext else "",  # Preserve original content (truncated)
-                },
-                "metadata": {
-                    "processed_at": datetime.now().isoformat(),
-                    "source": f"empty_response_{ai_client.provider}"
-                }
-            }
-        
-        # Try to extract JSON (might be returned in markdown code block format)
-        if '```json' in result_text:
-            result_text = result_text.split('```json')[1].split('```')[0].strip()
-        elif '```' in result_text:
-            parts = result_text.split('```')
-            for i, part in enumerate(parts):
-                if i % 2 == 1:  # Code block content
-                    try:
-                        json.loads(part.strip())
-                        result_text = part.strip()
-                        break
-                    except:
-                        continue
-        
-        # If still contains JSON object, try to extract
-        if '{' in result_text and '}' in result_text:
-            start = result_text.find('{')
-            end = result_text.rfind('}') + 1
-            result_text = result_text[start:end]
-        
-        # Parse JSON
-        ai_result = json.loads(result_text)
-        
-        # Merge original data and AI processing results
-        is_valid = ai_result.get('is_valid', False)
-        
-        # If article is invalid (filtered), still preserve original content for reference
-        if not is_valid:
-            processed_article = {
-                "original": {
-                    "title": title,
-                    "description": description,
-                    "maintext": maintext,
-                    "authors": authors,
-                    "date_publish": date_publish,
-                    "source_domain": source,
-                    "url": article.get('url', ''),
-                    "homepage_source": article.get('homepage_source', ''),
-                },
-                "processed": {
-                    "is_valid": False,
-                    "category": "其他",  # Keep category for display
-                    "key_points": [],
-                    "title_zh": title,  # Keep original title for reference
-                    "description_zh": description or "",  # Keep original description
-                    "summary_zh": "该文章被AI标记为无效（非严肃新闻：花边/娱乐/体育/养生保健等）",
-                    "maintext_zh": maintext[:500] if maintext else "",  # Keep truncated original content for reference
-                },
-                "metadata": {
-                    "processed_at": datetime.now().isoformat(),
-                    "source": f"{ai_client.provider}-{ai_client.model_name}",
-                    "filtered_reason": "非严肃新闻（花边/娱乐/体育/养生保健等）"
-                }
-            }
-        else:
-            # Valid article, process normally
-            processed_article = {
-                "original": {
-                    "title": title,
-                    "description": description,
-                    "maintext": maintext,
-                    "authors": authors,
-                    "date_publish": date_publish,
-                    "source_domain": source,
-                    "url": article.get('url', ''),
-                    "homepage_source": article.get('homepage_source', ''),
-                },
-                "processed": {
-                    "is_valid": True,
-                    "category": ai_result.get('category', '其他无关新闻'),
-                    "key_points": ai_result.get('key_points', []),
-                    "title_zh": ai_result.get('title_zh', ''),
-                    "description_zh": ai_result.get('description_zh', ''),
-                    "summary_zh": ai_result.get('summary_zh', ''),
-                    "maintext_zh": ai_result.get('maintext_zh', ''),
-                },
-                "metadata": {
-                    "processed_at": datetime.now().isoformat(),
-                    "source": f"{ai_client.provider}-{ai_client.model_name}"
-                }
-            }
-        
-        return processed_article
-        
-    except json.JSONDecodeError as e:
-        print(f"  ⚠️  JSON解析失败: {e}")
-        if 'result_text' in locals():
-            print(f"  响应内容: {result_text[:200]}")
-        # Return article with original content when JSON parsing fails
-        return {
-            "original": {
-                "title": title,
-                "description": description,
-                "maintext": maintext,
-                "authors": authors,
-                "date_publish": date_publish,
-                "source_domain": source,
-                "url": article.get('url', ''),
-                "homepage_source": article.get('homepage_source', ''),
-            },
-            "processed": {
-                "is_valid": True,
-                "category": "其他",
-                "key_points": [],
-                "title_zh": title,
-                "description_zh": description or "",
-                "summary_zh": f"JSON解析失败，保留原始内容。错误: {str(e)[:100]}",
-                "maintext_zh": maintext[:1000] if maintext else "",
-            },
-            "metadata": {
-                "processed_at": datetime.now().isoformat(),
-                "source": f"json_error_{ai_client.provider}",
-                "error": str(e)
-            }
-        }
-    except Exception as e:
-        print(f"  ⚠️  AI处理失败: {e}")
-        # Return article with original content when exception occurs
-        return {
-            "original": {
-                "title": title,
-                "description": description,
-                "maintext": maintext,
-                "authors": authors,
-                "date_publish": date_publish,
-                "source_domain": source,
-                "url": article.get('url', ''),
-                "homepage_source": article.get('homepage_source', ''),
-            },
-            "processed": {
-                "is_valid": True,
-                "category": "其他",
-                "key_points": [],
-                "title_zh": title,
-                "description_zh": description or "",
-                "summary_zh": f"处理异常，保留原始内容。错误: {str(e)[:100]}",
-                "maintext_zh": maintext[:1000] if maintext else "",
-            },
-            "metadata": {
-                "processed_at": datetime.now().isoformat(),
-                "source": f"exception_{ai_client.provider}",
-                "error": str(e)
-            }
-        }
+# Buffer size for writing the final report files (few large writes instead of many small ones)
+REPORT_WRITE_BUFFER = 1 << 20
 
-def find_latest_articles_file() -> Optional[str]:
-    """Find the latest article JSON file from the data folder"""
-    if not os.path.exists(DATA_DIR):
-        print(f"❌ 数据文件夹不存在: {DATA_DIR}")
-        return None
-    
-    # Find all JSON files
-    json_files = []
-    for filename in os.listdir(DATA_DIR):
-        if filename.endswith('.json'):
-            filepath = os.path.join(DATA_DIR, filename)
-            if os.path.isfile(filepath):
-                mtime = os.path.getmtime(filepath)
-                json_files.append((mtime, filepath, filename))
-    
-    if not json_files:
-        print(f"❌ 在 {DATA_DIR} 文件夹中未找到JSON文件")
-        return None
-    
-    # Sort by modification time, return the latest
-    json_files.sort(reverse=True)
-    latest_file = json_files[0][1]
-    print(f"✓ 找到最新文章文件: {json_files[0][2]}")
-    return latest_file
+# HTML reports larger than this also get a gzip copy (report.html.gz) for archiving/transfer
+HTML_GZIP_THRESHOLD = 1 << 20
 
-def get_article_id(article: Dict) -> str:
-    """Generate unique article ID (based on URL)"""
-    url = article.get('url', '')
-    if url:
-        return hashlib.md5(url.encode()).hexdigest()
-    # If no URL, use combination of title and source
-    title = article.get('title', '')
-    source = article.get('source_domain', '')
-    return hashlib.md5(f"{title}_{source}".encode()).hexdigest()
+# Per-article progress goes through the 'news' logger; LOG_LEVEL=DEBUG adds length details,
+# LOG_LEVEL=WARNING keeps only problems
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+log = logging.getLogger('news')
 
-def load_processed_cache(cache_file: str) -> Dict[str, Dict]:
-    """Load processed article cache"""
-    if os.path.exists(cache_file):
+# Processed cache is flushed every N articles or T seconds, whichever comes first
+CACHE_FLUSH_BATCH = 5
+CACHE_FLUSH_SECONDS = 10.0
+# fsync the cache file after this many appended batches (and when the writer closes)
+CACHE_FSYNC_EVERY = 10
+CACHE_OPEN_FLAGS = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_CLOEXEC', 0) | getattr(os, 'O_BINARY', 0)
+
+# JSON object or array inside a markdown code block; otherwise the first value is raw-decoded
+JSON_FENCE_RE = re.compile(r'```(?:json)?\s*([{\[].*?[}\]])\s*```', re.DOTALL)
+JSON_DECODER = json.JSONDecoder()
+
+# Number of articles sent to the AI provider concurrently (calls are network-bound)
+AI_CONCURRENCY = max(1, int(os.getenv('AI_CONCURRENCY', '8')))
+# Maximum number of AI requests started per second across all workers
+AI_RATE_LIMIT = float(os.getenv('AI_RATE_LIMIT', '1'))
+# Articles sent per AI request (1 = one prompt per article; 3-8 cuts API calls at the cost of longer responses)
+AI_BATCH_SIZE = max(1, int(os.getenv('AI_BATCH_SIZE', '1')))
+# Retries for transient AI errors (rate limit / 5xx / timeout), with exponential backoff and jitter
+AI_MAX_RETRIES = max(0, int(os.getenv('AI_MAX_RETRIES', '3')))
+AI_RETRY_BASE_DELAY = 2.0
+AI_RETRY_MAX_DELAY = 60.0
+TRANSIENT_ERROR_RE = re.compile(
+    r'\b(?:429|5\d\d)\b|rate.?limit|too many requests|timed? ?out|overloaded|temporarily unavailable|connection',
+    re.IGNORECASE,
+)
+RATE_LIMIT_ERROR_RE = re.compile(r'\b429\b|rate.?limit|too many requests', re.IGNORECASE)
+
+def _load_json_file(path: str):
+    """Parse a JSON file; with orjson the file is memory-mapped instead of read into a copy"""
+    with open(path, 'rb') as f:
+        if orjson is None:
+            return json.loads(f.read())
         try:
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
-                print(f"  ✓ 加载缓存: {len(cache_data)} 篇已处理文章")
-                return cache_data
-        except Exception as e:
-            print(f"  ⚠️  加载缓存失败: {e}")
-            return {}
-    return {}
-
-def save_processed_cache(cache_file: str, processed_dict: Dict[str, Dict]):
-    """Save processed article cache"""
-    try:
-        # Use temporary file to ensure atomic write
-        temp_file = cache_file + '.tmp'
-        with open(temp_file, 'w', encoding='utf-8') as f:
-            json.dump(processed_dict, f, ensure_ascii=False, indent=2)
-        os.replace(temp_file, cache_file)
-    except Exception as e:
-        print(f"  ⚠️  保存缓存失败: {e}")
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can't be mapped; let the parser report them
+            return orjson.loads(f.read())
+        with mm, memoryview(mm) as view:
+            return orjson.loads(view)
 
-def save_intermediate_results(processed_articles: List[Dict], report_dir: str):
-    """Save intermediate results"""
-    try:
-        intermediate_file = os.path.join(report_dir, 'report_intermediate.json')
-        report = generate_report(processed_articles)
-        with open(intermediate_file, 'w', encoding='utf-8') as f:
-            json.dump(report, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        print(f"  ⚠️  保存中间结果失败: {e}")
+def _write_json(path: str, obj, indent: bool = True):
+    """Write obj as JSON without building an intermediate str copy"""
+    if orjson is not None:
+        with atomic_open(path, 'wb') as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0))
+    else:
+        # The stdlib encoder streams chunks straight into the file
+        with atomic_open(path, 'w', encoding='utf-8') as f:
+            json.dump(obj, f, ensure_ascii=False, indent=2 if indent else None)
 
-def load_articles() -> List[Dict]:
-    """Load article data (load the latest file from the data folder)"""
-    # Priority: use file specified by environment variable
-    articles_file = os.getenv('ARTICLES_FILE')
-    
-    if articles_file:
-        # If file is specified, use it directly
-        if not os.path.isabs(articles_file):
-            articles_file = os.path.join(DATA_DIR, articles_file) if not os.path.exists(articles_file) else articles_file
+def _setup_logging():
+    """Route the 'news' logger to the current stdout (run.py tees stdout into the log file)"""
+    if not log.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        log.addHandler(handler)
+        log.propagate = False
     else:
-        # Otherwise, find the latest file
-        articles_file = find_latest_articles_file()
-    
-    if not articles_file:
-        return []
-    
-    try:
-        with open(articles_file, 'r', encoding='utf-8') as f:
-            articles = json.load(f)
-        print(f"✓ 成功加载 {len(articles)} 篇文章")
-        return articles
-    except FileNotFoundError:
-        print(f"❌ 文件不存在: {articles_file}")
-        return []
-    except json.JSONDecodeError as e:
-        print(f"❌ JSON解析错误: {e}")
-        return []
+        log.handlers[0].setStream(sys.stdout)
+    log.setLevel(LOG_LEVEL)
 
-def generate_report(processed_articles: List[Dict]) -> Dict:
-    """Generate summary report"""
-    total = len(processed_articles)
-    valid_articles = [a for a in processed_articles if a['processed']['is_valid']]
-    invalid_count = total - len(valid_articles)
-    
-    # Statistics by category
-    category_stats = {}
-    for article in valid_articles:
-        category = article['processed']['category']
-        category_stats[category] = category_stats.get(category, 0) + 1
-    
-    # Statistics by source
-    source_stats = {}
-    for article in valid_articles:
-        source = article['original']['source_domain']
-        source_stats[source] = source_stats.get(source, 0) + 1
-    
-    report = {
-        "summary": {
-            "total_articles": total,
-            "valid_articles": len(valid_articles),
-            "invalid_articles": invalid_count,
-            "processing_date": datetime.now().isoformat(),
-        },
-        "statistics": {
-            "by_category": category_stats,
-            "by_source": source_stats,
-        },
-        "articles": valid_articles
-    }
-    
-    return report
+class RateLimiter:
+    """Thread-safe token bucket limiting how often AI requests are started"""
 
-def generate_markdown_report(report: Dict) -> str:
-    """Generate Markdown format report"""
-    md = []
-    
-    # Title
-    md.append("# 尼日利亚新闻汇总报告\n")
-    md.append(f"**生成时间**: {report['summary']['processing_date']}\n")
-    
-    # Summary
-    md.append("## 📊 数据摘要\n")
-    md.append(f"- **总文章数**: {report['summary']['total_articles']}")
-    md.append(f"- **有效文章**: {report['summary']['valid_articles']}")
-    md.append(f"- **无效文章**: {report['summary']['invalid_articles']}\n")
-    
-    # Category statistics
-    md.append("## 📁 分类统计\n")
-    for category, count in sorted(report['statistics']['by_category'].items(), 
-                                  key=lambda x: x[1], reverse=True):
-        md.append(f"- **{category}**: {count} 篇")
-    md.append("")
-    
-    # Source statistics
-    md.append("## 📰 来源统计\n")
-    for source, count in sorted(report['statistics']['by_source'].items(), 
-                               key=lambda x: x[1], reverse=True):
-        md.append(f"- **{source}**: {count} 篇")
-    md.append("")
-    
-    # Article list
-    md.append("## 📄 文章详情\n")
-    md.append("---\n")
-    
-    for i, article in enumerate(report['articles'], 1):
-        original = article['original']
-        processed = article['processed']
-        
-        md.append(f"### {i}. {processed['title_zh'] or original['title']}\n")
-        md.append(f"**原文标题**: {original['title']}\n")
-        md.append(f"**分类**: {processed['category']}\n")
-        md.append(f"**来源**: {original['source_domain']}\n")
-        md.append(f"**作者**: {', '.join(original['authors']) if original['authors'] else '未知'}\n")
-        md.append(f"**发布日期**: {original['date_publish']}\n")
-        md.append(f"**链接**: {original['url']}\n")
-        
-        if processed['description_zh']:
-            md.append(f"\n**描述**:\n{processed['description_zh']}\n")
-        
-        if processed['key_points']:
-            md.append("\n**关键要点**:\n")
-            for point in processed['key_points']:
-                md.append(f"- {point}")
-            md.append("")
-        
-        if processed['summary_zh']:
-            md.append(f"\n**摘要**:\n{processed['summary_zh']}\n")
-        
-        if processed['maintext_zh']:
-            md.append("\n**正文（中文）**:\n")
-            md.append(f"{processed['maintext_zh']}\n")
-        
-        md.append("\n---\n")
-    
-    return "\n".join(md)
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
 
-def generate_html_report(report: Dict) -> str:
-    """Generate HTML format report"""
-    html = []
-    
-    # HTML header
-    processing_date = report['summary']['processing_date']
-    html.append(f"""<!DOCTYPE html>
+    def acquire(self):
+        """Block until a token is available, then consume it"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hold back every worker for about `seconds` (e.g. after the provider reports a rate limit)"""
+        if self.rate <= 0:
+            return
+        with self.lock:
+            self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+# Report templates (filled once per section/article with str.format_map)
+MD_HEADER_TMPL = """# 尼日利亚新闻汇总报告
+
+**生成时间**: {processing_date}
+
+## 📊 数据摘要
+
+- **总文章数**: {total_articles}
+- **有效文章**: {valid_articles}
+- **无效文章**: {invalid_articles}
+
+"""
+
+MD_ARTICLE_TMPL = """### {i}. {display_title}
+
+**原文标题**: {title}
+
+**分类**: {category}
+
+**来源**: {source_domain}
+
+**作者**: {authors}
+
+**发布日期**: {date_publish}
+
+**链接**: {url}
+
+"""
+
+HTML_HEADER_TMPL = """<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
     <meta charset="UTF-8">
@@ -662,13 +327,9 @@ def generate_html_report(report: Dict) -> str:
         <div class="summary">
             <div class="summary-item"><strong>生成时间</strong>: {processing_date}</div>
         </div>
-    """)
-    
-    # Data summary
-    total_articles = report['summary']['total_articles']
-    valid_articles = report['summary']['valid_articles']
-    invalid_articles = report['summary']['invalid_articles']
-    html.append(f"""
+"""
+
+HTML_SUMMARY_TMPL = """
         <h2>📊 数据摘要</h2>
         <div class="stats">
             <div class="stat-card">
@@ -684,87 +345,883 @@ def generate_html_report(report: Dict) -> str:
                 <div class="value">{invalid_articles}</div>
             </div>
         </div>
-    """)
-    
-    # Category statistics
-    html.append("<h2>📁 分类统计</h2>")
-    html.append('<div class="stats">')
-    for category, count in sorted(report['statistics']['by_category'].items(), 
-                                  key=lambda x: x[1], reverse=True):
-        html.append(f"""
-            <div class="stat-card">
-                <h4>{category}</h4>
-                <div class="value">{count} 篇</div>
-            </div>
-        """)
-    html.append("</div>")
-    
-    # Source statistics
-    html.append("<h2>📰 来源统计</h2>")
-    html.append('<div class="stats">')
-    for source, count in sorted(report['statistics']['by_source'].items(), 
-                               key=lambda x: x[1], reverse=True):
-        html.append(f"""
+"""
+
+HTML_STAT_CARD_TMPL = """
             <div class="stat-card">
-                <h4>{source}</h4>
+                <h4>{name}</h4>
                 <div class="value">{count} 篇</div>
             </div>
-        """)
-    html.append("</div>")
-    
-    # Article list
-    html.append("<h2>📄 文章详情</h2>")
+"""
+
+# Whole article block; optional parts are pre-rendered below or left empty
+HTML_ARTICLE_TMPL = """<div class="article">
+<div class="article-header">
+<h3 class="article-title">{i}. {display_title}</h3>
+<span class="category-badge">{category}</span>
+</div>
+<div class="article-meta">
+<span><strong>原文标题</strong>: {title}</span>
+<span><strong>来源</strong>: {source_domain}</span>
+{authors}{date_publish}</div>
+{url}{description}{key_points}{summary}{maintext}</div>
+"""
+HTML_AUTHORS_TMPL = '<span><strong>作者</strong>: {}</span>\n'
+HTML_DATE_TMPL = '<span><strong>发布日期</strong>: {}</span>\n'
+HTML_LINK_TMPL = '<p><a href="{}" class="link" target="_blank">查看原文</a></p>\n'
+HTML_CONTENT_TMPL = '<div class="content"><strong>{}</strong>:<br>{}</div>\n'
+HTML_KEY_POINTS_TMPL = '<div class="key-points"><strong>关键要点</strong>:<ul>\n{}</ul></div>\n'
+
+# Single-pass HTML escaping via str.translate (AI/crawled text must not inject markup)
+HTML_ESCAPE_TABLE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&#x27;',
+})
+
+HTML_FOOTER = """
+    </div>
+</body>
+</html>
+"""
+
+@functools.lru_cache(maxsize=1)
+def load_prompt_template() -> str:
+    """Load prompt template file (cached after the first call)
+    Priority: environment variable PROMPT_TEMPLATE > file prompt_template.txt > default template
+    """
+    # Priority: read from environment variable (for GitHub Actions, etc.)
+    prompt_from_env = os.getenv('PROMPT_TEMPLATE')
+    if prompt_from_env:
+        print("✓ 从环境变量加载 prompt")
+        return prompt_from_env.strip()
     
-    for i, article in enumerate(report['articles'], 1):
-        original = article['original']
-        processed = article['processed']
+    # If environment variable doesn't exist, try reading from file
+    try:
+        if os.path.exists(PROMPT_TEMPLATE_FILE):
+            with open(PROMPT_TEMPLATE_FILE, 'r', encoding='utf-8') as f:
+                print("✓ 从文件加载 prompt")
+                return f.read().strip()
+        else:
+            # If file doesn't exist, return default template
+            print(f"⚠️  Prompt模板文件不存在: {PROMPT_TEMPLATE_FILE}，使用默认模板")
+            return """请你将以下新闻翻译为中文。"""
+    except Exception as e:
+        print(f"⚠️  加载prompt模板失败: {e}，使用默认模板")
+        return """请你将以下新闻翻译为中文。"""
+
+@functools.lru_cache(maxsize=1)
+def compile_prompt_template():
+    """Split the prompt template once into literal text and named fields
+    Returns render(fields) joining the pieces directly, so the format string
+    isn't re-parsed for every article. Templates using format specs,
+    conversions or indexed fields fall back to str.format.
+    """
+    template = load_prompt_template()
+    pieces = []
+    slots = []  # (position in pieces, field name)
+    for literal, field_name, format_spec, conversion in string.Formatter().parse(template):
+        if literal:
+            pieces.append(literal)
+        if field_name is None:
+            continue
+        if format_spec or conversion or not field_name.isidentifier():
+            return lambda fields: template.format(**fields)
+        slots.append((len(pieces), field_name))
+        pieces.append('')
+    
+    def render(fields: Dict) -> str:
+        out = pieces.copy()
+        for index, name in slots:
+            out[index] = str(fields[name])
+        return ''.join(out)
+    return render
+
+def _generate_with_retry(ai_client: AIClient, prompt: str, rate_limiter: Optional[RateLimiter] = None) -> Dict:
+    """Call the AI provider, retrying transient errors with exponential backoff and jitter
+    Each attempt waits for a rate limiter token; a rate-limit error also slows
+    down the other workers sharing the limiter.
+    """
+    for attempt in range(AI_MAX_RETRIES + 1):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        response = ai_client.generate_content(prompt)
+        error = response.get('error')
+        if not error or attempt == AI_MAX_RETRIES or not TRANSIENT_ERROR_RE.search(str(error)):
+            return response
+        delay = min(AI_RETRY_MAX_DELAY, AI_RETRY_BASE_DELAY * 2 ** attempt) * random.uniform(0.5, 1.0)
+        log.warning(f"  ⏳ AI请求暂时失败（{str(error)[:80]}），{delay:.1f} 秒后重试（{attempt + 1}/{AI_MAX_RETRIES}）")
+        if rate_limiter is not None and RATE_LIMIT_ERROR_RE.search(str(error)):
+            rate_limiter.pause(delay)
+        else:
+            time.sleep(delay)
+    return response
+
+def _build_original(article: Dict) -> Dict:
+    """Original (untranslated) article fields kept alongside the AI results"""
+    return {
+        "title": article.get('title', ''),
+        "description": article.get('description', ''),
+        "maintext": article.get('maintext', ''),
+        "authors": article.get('authors', []),
+        "date_publish": article.get('date_publish', ''),
+        "source_domain": article.get('source_domain', ''),
+        "url": article.get('url', ''),
+        "homepage_source": article.get('homepage_source', ''),
+    }
+
+def _extract_json(text: str, opener: str):
+    """Parse the JSON payload of an AI response
+    Uses the first fenced code block that parses, otherwise decodes the first
+    value starting at `opener` and ignores any trailing text.
+    """
+    for match in JSON_FENCE_RE.finditer(text):
+        try:
+            return json_loads(match.group(1))
+        except ValueError:
+            continue
+    return JSON_DECODER.raw_decode(text, max(text.find(opener), 0))[0]
+
+def _pick_ai_fields(ai_result, result_text: str) -> Dict:
+    """Pull the fields the report needs out of the parsed AI response
+    Any extra keys the model emits are dropped right away.
+    """
+    if not isinstance(ai_result, dict):
+        raise json.JSONDecodeError("AI响应不是JSON对象", result_text, 0)
+    return {
+        "is_valid": ai_result.get('is_valid', False),
+        "category": ai_result.get('category', '其他无关新闻'),
+        "key_points": ai_result.get('key_points', []),
+        "title_zh": ai_result.get('title_zh', ''),
+        "description_zh": ai_result.get('description_zh', ''),
+        "summary_zh": ai_result.get('summary_zh', ''),
+        "maintext_zh": ai_result.get('maintext_zh', ''),
+    }
+
+def _render_prompt(original: Dict) -> str:
+    """Fill the prompt template with one article's fields"""
+    maintext = original['maintext']
+    authors = original['authors']
+    
+    # Limit main text length (to avoid token limits)
+    if len(maintext) > PREVIEW_LIMIT:
+        maintext_preview = maintext[:PREVIEW_LIMIT] + PREVIEW_TRUNC_MARK
+    else:
+        maintext_preview = maintext
+    
+    # Load and fill the precompiled prompt template
+    if PROMPT_TEMPLATE_RELOAD:
+        load_prompt_template.cache_clear()
+        compile_prompt_template.cache_clear()
+    render = compile_prompt_template()
+    return render({
+        "title": original['title'],
+        "description": original['description'],
+        "authors": ', '.join(authors) if authors else '未知',
+        "date_publish": original['date_publish'],
+        "source": original['source_domain'],
+        "maintext_preview": maintext_preview,
+    })
+
+def _build_ai_result(ai_client: AIClient, original: Dict, ai_result: Dict, processed_at: str) -> Dict:
+    """Merge original data and the picked AI fields into a processed article"""
+    title = original['title']
+    description = original['description']
+    maintext = original['maintext']
+    
+    is_valid = ai_result['is_valid']
+    
+    # If article is invalid (filtered), still preserve original content for reference
+    if not is_valid:
+        processed_article = {
+            "original": original,
+            "processed": {
+                "is_valid": False,
+                "category": "其他",  # Keep category for display
+                "key_points": [],
+                "title_zh": title,  # Keep original title for reference
+                "description_zh": description or "",  # Keep original description
+                "summary_zh": "该文章被AI标记为无效（非严肃新闻：花边/娱乐/体育/养生保健等）",
+                "maintext_zh": maintext[:500] if maintext else "",  # Keep truncated original content for reference
+            },
+            "metadata": {
+                "processed_at": processed_at,
+                "source": f"{ai_client.provider}-{ai_client.model_name}",
+                "filtered_reason": "非严肃新闻（花边/娱乐/体育/养生保健等）"
+            }
+        }
+    else:
+        # Valid article, process normally
+        processed_article = {
+            "original": original,
+            "processed": {
+                "is_valid": True,
+                "category": ai_result['category'],
+                "key_points": ai_result['key_points'],
+                "title_zh": ai_result['title_zh'],
+                "description_zh": ai_result['description_zh'],
+                "summary_zh": ai_result['summary_zh'],
+                "maintext_zh": ai_result['maintext_zh'],
+            },
+            "metadata": {
+                "processed_at": processed_at,
+                "source": f"{ai_client.provider}-{ai_client.model_name}"
+            }
+        }
+    
+    return processed_article
+
+def process_article_with_ai(ai_client: AIClient, article: Dict, now_iso: Optional[str] = None,
+                            rate_limiter: Optional[RateLimiter] = None) -> Optional[Dict]:
+    """
+    Process a single article with AI:
+    1. Filter low-quality or irrelevant articles
+    2. Extract key information
+    3. Translate to Chinese
+    now_iso: batch timestamp for processed_at (defaults to the current time)
+    rate_limiter: shared limiter each request (and retry) waits on
+    """
+    if not ai_client:
+        return None
+    
+    processed_at = now_iso or datetime.now().isoformat()
+    
+    # Prepare article content (the same original dict is shared by every result branch)
+    original = _build_original(article)
+    title = original['title']
+    description = original['description']
+    maintext = original['maintext']
+    
+    # If main text is too short, it's not a complete article: skip all prompt work
+    if _is_too_short(article):
+        log.warning(f"  ⚠️  文章内容过短（{len(maintext or '')} 字符），跳过AI处理")
+        return _build_too_short(article, processed_at)
+    
+    prompt = _render_prompt(original)
+
+    try:
+        # Use unified AI client interface (with rate limiting and retries)
+        response = _generate_with_retry(ai_client, prompt, rate_limiter)
         
-        html.append('<div class="article">')
-        html.append('<div class="article-header">')
-        html.append(f'<h3 class="article-title">{i}. {processed["title_zh"] or original["title"]}</h3>')
-        html.append(f'<span class="category-badge">{processed["category"]}</span>')
-        html.append('</div>')
+        # Check for errors
+        if 'error' in response:
+            error = response['error']
+            if '安全过滤器' in error or 'SAFETY' in str(response.get('finish_reason', '')):
+                log.warning(f"  ⚠️  内容被安全过滤器阻止")
+                # Return basic data
+                return {
+                    "original": original,
+                    "processed": {
+                        "is_valid": True,
+                        "category": "其他",
+                        "key_points": [],
+                        "title_zh": "",
+                        "description_zh": "",
+                        "summary_zh": "内容被安全过滤器阻止，无法进行AI处理",
+                        "maintext_zh": "",
+                    },
+                    "metadata": {
+                        "processed_at": processed_at,
+                        "source": f"blocked_by_safety_filter_{ai_client.provider}"
+                    }
+                }
+            else:
+                log.warning(f"  ⚠️  AI处理失败: {error}")
+                # Return article with original content, marked as processing failed
+                return {
+                    "original": original,
+                    "processed": {
+                        "is_valid": True,  # Keep as valid to preserve content
+                        "category": "其他",
+                        "key_points": [],
+                        "title_zh": title,  # Use original title as fallback
+                        "description_zh": description or "",  # Use original description as fallback
+                        "summary_zh": f"AI处理失败: {error}",
+                        "maintext_zh": maintext[:500] if maintext else "",  # Preserve original content (truncated)
+                    },
+                    "metadata": {
+                        "processed_at": processed_at,
+                        "source": f"error_{ai_client.provider}",
+                        "error": error
+                    }
+                }
+        
+        result_text = response.get('text', '')
+        if not result_text:
+            log.warning(f"  ⚠️  响应中没有文本内容，保留原始内容")
+            # Return article with original content
+            return {
+                "original": original,
+                "processed": {
+                    "is_valid": True,
+                    "category": "其他",
+                    "key_points": [],
+                    "title_zh": title,
+                    "description_zh": description or "",
+                    "summary_zh": "AI响应为空，保留原始内容",
+                    "maintext_zh": maintext[:1000] if maintext else "",  # Preserve original content (truncated)
+                },
+                "metadata": {
+                    "processed_at": processed_at,
+                    "source": f"empty_response_{ai_client.provider}"
+                }
+            }
+        
+        # Extract the JSON object (might be returned in markdown code block format)
+        parsed = _extract_json(result_text, '{')
         
-        html.append('<div class="article-meta">')
-        html.append(f'<span><strong>原文标题</strong>: {original["title"]}</span>')
-        html.append(f'<span><strong>来源</strong>: {original["source_domain"]}</span>')
-        if original['authors']:
-            html.append(f'<span><strong>作者</strong>: {", ".join(original["authors"])}</span>')
-        if original['date_publish']:
-            html.append(f'<span><strong>发布日期</strong>: {original["date_publish"]}</span>')
-        html.append('</div>')
+        # Keep only the fields we use
+        ai_result = _pick_ai_fields(parsed, result_text)
+        
+        # Merge original data and AI processing results
+        processed_article = _build_ai_result(ai_client, original, ai_result, processed_at)
+        return processed_article
         
-        if original['url']:
-            html.append(f'<p><a href="{original["url"]}" class="link" target="_blank">查看原文</a></p>')
+    except json.JSONDecodeError as e:
+        log.warning(f"  ⚠️  JSON解析失败: {e}")
+        if 'result_text' in locals():
+            log.warning(f"  响应内容: {result_text[:200]}")
+        # Return article with original content when JSON parsing fails
+        return {
+            "original": original,
+            "processed": {
+                "is_valid": True,
+                "category": "其他",
+                "key_points": [],
+                "title_zh": title,
+                "description_zh": description or "",
+                "summary_zh": f"JSON解析失败，保留原始内容。错误: {str(e)[:100]}",
+                "maintext_zh": maintext[:1000] if maintext else "",
+            },
+            "metadata": {
+                "processed_at": processed_at,
+                "source": f"json_error_{ai_client.provider}",
+                "error": str(e)
+            }
+        }
+    except Exception as e:
+        log.warning(f"  ⚠️  AI处理失败: {e}")
+        # Return article with original content when exception occurs
+        return {
+            "original": original,
+            "processed": {
+                "is_valid": True,
+                "category": "其他",
+                "key_points": [],
+                "title_zh": title,
+                "description_zh": description or "",
+                "summary_zh": f"处理异常，保留原始内容。错误: {str(e)[:100]}",
+                "maintext_zh": maintext[:1000] if maintext else "",
+            },
+            "metadata": {
+                "processed_at": processed_at,
+                "source": f"exception_{ai_client.provider}",
+                "error": str(e)
+            }
+        }
+
+def process_articles_batch(ai_client: AIClient, articles: List[Dict], now_iso: Optional[str] = None,
+                           rate_limiter: Optional[RateLimiter] = None) -> Optional[List[Dict]]:
+    """
+    Process several articles with a single AI request
+    Each article's prompt is numbered in one message and the model answers with a
+    JSON array in the same order. Returns None when the response can't be matched
+    back to the articles, so the caller can fall back to one request per article.
+    """
+    if not ai_client or not articles:
+        return None
+    
+    processed_at = now_iso or datetime.now().isoformat()
+    originals = [_build_original(article) for article in articles]
+    count = len(originals)
+    
+    parts = [f"以下共有 {count} 篇新闻，请按各篇的要求分别处理。"]
+    for n, original in enumerate(originals, 1):
+        parts.append(f"\n### ARTICLE {n}\n{_render_prompt(original)}")
+    parts.append(
+        f"\n请返回一个包含 {count} 个JSON对象的JSON数组，顺序与上面的文章一致，"
+        f"每个对象包含 is_valid, category, key_points, title_zh, description_zh, summary_zh, maintext_zh 字段。"
+    )
+    
+    try:
+        response = _generate_with_retry(ai_client, ''.join(parts), rate_limiter)
+        if 'error' in response:
+            log.warning(f"  ⚠️  批量AI处理失败: {response['error']}，改为逐篇处理")
+            return None
         
-        if processed['description_zh']:
-            html.append(f'<div class="content"><strong>描述</strong>:<br>{processed["description_zh"]}</div>')
+        result_text = response.get('text', '') or ''
+        parsed = _extract_json(result_text, '[')
         
-        if processed['key_points']:
-            html.append('<div class="key-points"><strong>关键要点</strong>:<ul>')
-            for point in processed['key_points']:
-                html.append(f'<li>{point}</li>')
-            html.append('</ul></div>')
+        if not isinstance(parsed, list) or len(parsed) != count:
+            log.warning(f"  ⚠️  批量响应数量不匹配（期望 {count} 篇），改为逐篇处理")
+            return None
         
-        if processed['summary_zh']:
-            html.append(f'<div class="content"><strong>摘要</strong>:<br>{processed["summary_zh"]}</div>')
+        return [
+            _build_ai_result(ai_client, original, _pick_ai_fields(item, result_text), processed_at)
+            for original, item in zip(originals, parsed)
+        ]
+    except Exception as e:
+        log.warning(f"  ⚠️  批量响应解析失败: {e}，改为逐篇处理")
+        return None
+
+def find_latest_articles_file() -> Optional[str]:
+    """Find the latest article JSON file from the data folder"""
+    if not os.path.exists(DATA_DIR):
+        print(f"❌ 数据文件夹不存在: {DATA_DIR}")
+        return None
+    
+    # Find the most recently modified JSON file in a single pass
+    with os.scandir(DATA_DIR) as entries:
+        latest = max(
+            (e for e in entries if e.name.endswith('.json') and e.is_file()),
+            key=lambda e: (e.stat().st_mtime, e.name),
+            default=None
+        )
+    
+    if latest is None:
+        print(f"❌ 在 {DATA_DIR} 文件夹中未找到JSON文件")
+        return None
+    
+    print(f"✓ 找到最新文章文件: {latest.name}")
+    return latest.path
+
+def _select_id_hash():
+    """Pick the hex-digest function used for article IDs"""
+    if ARTICLE_ID_HASH != 'md5':
+        if blake3 is not None and ARTICLE_ID_HASH in ('', 'blake3'):
+            return lambda data: blake3(data).hexdigest()
+        if xxhash is not None and ARTICLE_ID_HASH in ('', 'xxhash'):
+            return xxhash.xxh3_64_hexdigest
+    return lambda data: hashlib.md5(data).hexdigest()
+
+_id_hexdigest = _select_id_hash()
+
+def get_article_id(article: Dict) -> str:
+    """Generate unique article ID (based on URL)"""
+    url = article.get('url', '')
+    if url:
+        return _id_hexdigest(url.encode())
+    # If no URL, use combination of title and source
+    title = article.get('title', '')
+    source = article.get('source_domain', '')
+    return _id_hexdigest(f"{title}_{source}".encode())
+
+def load_processed_cache(cache_file: str) -> Dict[str, Dict]:
+    """Load processed article cache (JSONL: one {"id": ..., "article": ...} record per line)"""
+    cache_data = {}
+    if not os.path.exists(cache_file):
+        return cache_data
+    try:
+        line_count = 0
+        with open(cache_file, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                line_count += 1
+                try:
+                    record = json_loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-append can leave a truncated last line
+                    continue
+                cache_data[record['id']] = record['article']
+        print(f"  ✓ 加载缓存: {len(cache_data)} 篇已处理文章")
+        # Duplicate or broken lines only grow the file (and a truncated last line
+        # would swallow the next append), so rewrite it with one line per article
+        if line_count > len(cache_data):
+            _compact_processed_cache(cache_file, cache_data)
+            print(f"  ✓ 压缩缓存: 移除 {line_count - len(cache_data)} 行重复/损坏记录")
+    except Exception as e:
+        print(f"  ⚠️  加载缓存失败: {e}")
+    return cache_data
+
+def _compact_processed_cache(cache_file: str, cache_data: Dict[str, Dict]):
+    """Atomically rewrite the cache with one line per article"""
+    with atomic_open(cache_file, 'wb') as f:
+        for article_id, article in cache_data.items():
+            f.write(json_dumps({"id": article_id, "article": article}) + b'\n')
+
+class CacheWriter:
+    """Write-behind buffer for the processed cache
+    A background thread serializes queued articles and appends them every
+    `batch_size` articles or `max_delay` seconds, so the main loop never waits
+    on disk. flush() blocks until everything queued so far is written.
+    The file descriptor stays open for the whole run and is fsynced every
+    CACHE_FSYNC_EVERY appends and on close.
+    """
+
+    def __init__(self, cache_file: str, batch_size: int = CACHE_FLUSH_BATCH, max_delay: float = CACHE_FLUSH_SECONDS):
+        self.cache_file = cache_file
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.queue = queue.Queue()
+        self.fd = None
+        self.unsynced = 0
+        self.thread = threading.Thread(target=self._run, name='cache-writer', daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def add(self, article_id: str, processed: Dict):
+        """Queue one processed article for the writer thread"""
+        self.queue.put((article_id, processed))
+
+    def flush(self):
+        """Wait until every article queued so far has been appended"""
+        if self.thread.is_alive():
+            done = threading.Event()
+            self.queue.put(done)
+            done.wait()
+
+    def close(self):
+        """Write what's left and stop the writer thread"""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+    def _run(self):
+        buffer = []
+        last_flush = time.monotonic()
+        while True:
+            timeout = max(0.0, self.max_delay - (time.monotonic() - last_flush)) if buffer else None
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = False  # Stale batch, just write it
+            if isinstance(item, tuple):
+                article_id, processed = item
+                # The original main text is already in data/*.json, so it is left out
+                # of the cache and restored from the source article on load
+                entry = {**processed, "original": {**processed['original'], "maintext": None}}
+                try:
+                    buffer.append(json_dumps({"id": article_id, "article": entry}) + b'\n')
+                except Exception as e:
+                    print(f"  ⚠️  缓存序列化失败: {e}")
+                if len(buffer) < self.batch_size:
+                    continue
+            self._write(buffer)
+            last_flush = time.monotonic()
+            if item is None:
+                self._close_fd()
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+
+    def _write(self, buffer: List[bytes]):
+        """Append buffered lines to the cache file"""
+        if buffer:
+            try:
+                if self.fd is None:
+                    self.fd = os.open(self.cache_file, CACHE_OPEN_FLAGS, 0o644)
+                data = memoryview(b''.join(buffer))
+                while data:
+                    data = data[os.write(self.fd, data):]
+                buffer.clear()
+                self.unsynced += 1
+                if self.unsynced >= CACHE_FSYNC_EVERY:
+                    os.fsync(self.fd)
+                    self.unsynced = 0
+            except Exception as e:
+                print(f"  ⚠️  保存缓存失败: {e}")
+
+    def _close_fd(self):
+        if self.fd is not None:
+            try:
+                if self.unsynced:
+                    os.fsync(self.fd)
+                os.close(self.fd)
+            except OSError as e:
+                print(f"  ⚠️  关闭缓存文件失败: {e}")
+            self.fd = None
+
+def save_intermediate_results(accumulator: 'ReportAccumulator', report_dir: str, include_articles: bool = True):
+    """Save intermediate results
+    Periodic saves pass include_articles=False and only write the counters plus
+    a pointer to the processed cache, which already holds every finished
+    article, so each save costs O(1) instead of re-serializing all articles.
+    """
+    try:
+        intermediate_file = os.path.join(report_dir, 'report_intermediate.json')
+        report = accumulator.snapshot(include_articles)
+        if not include_articles:
+            report["articles_cache"] = 'processed_cache.jsonl'
+        _write_json(intermediate_file, report, indent=False)  # Compact: rewritten often, read rarely
+    except Exception as e:
+        print(f"  ⚠️  保存中间结果失败: {e}")
+
+def load_articles() -> List[Dict]:
+    """Load article data (load the latest file from the data folder)"""
+    # Priority: use file specified by environment variable
+    articles_file = os.getenv('ARTICLES_FILE')
+    
+    if articles_file:
+        # If file is specified, use it directly
+        if not os.path.isabs(articles_file):
+            articles_file = os.path.join(DATA_DIR, articles_file) if not os.path.exists(articles_file) else articles_file
+    else:
+        # Otherwise, find the latest file
+        articles_file = find_latest_articles_file()
+    
+    if not articles_file:
+        return []
+    
+    try:
+        articles = _load_json_file(articles_file)
+        print(f"✓ 成功加载 {len(articles)} 篇文章")
+        return articles
+    except FileNotFoundError:
+        print(f"❌ 文件不存在: {articles_file}")
+        return []
+    except json.JSONDecodeError as e:
+        print(f"❌ JSON解析错误: {e}")
+        return []
+
+class ReportAccumulator:
+    """Report statistics updated incrementally as articles finish"""
+
+    def __init__(self):
+        self.total = 0
+        self.valid = {}  # Input index -> valid article
+        self.by_category = Counter()
+        self.by_source = Counter()
+
+    def add(self, index: int, article: Dict):
+        """Add one processed article (index is its position in the input file)"""
+        self.total += 1
+        if article['processed']['is_valid']:
+            self.valid[index] = article
+            self.by_category[article['processed']['category']] += 1
+            self.by_source[article['original']['source_domain']] += 1
+
+    def snapshot(self, include_articles: bool = True) -> Dict:
+        """Build the report from the current counters, articles in input order
+        Statistics are stored largest count first, so renderers use them as-is.
+        """
+        valid_count = len(self.valid)
+        report = {
+            "summary": {
+                "total_articles": self.total,
+                "valid_articles": valid_count,
+                "invalid_articles": self.total - valid_count,
+                "processing_date": datetime.now().isoformat(),
+            },
+            "statistics": {
+                "by_category": dict(self.by_category.most_common()),
+                "by_source": dict(self.by_source.most_common()),
+            },
+        }
+        if include_articles:
+            report["articles"] = [self.valid[i] for i in sorted(self.valid)]
+        return report
+
+def generate_report(processed_articles: List[Dict]) -> Dict:
+    """Generate summary report (single pass: validity filter and both stats together)"""
+    accumulator = ReportAccumulator()
+    for i, article in enumerate(processed_articles):
+        accumulator.add(i, article)
+    return accumulator.snapshot()
+
+def _esc(value) -> str:
+    """Escape text for interpolation into the HTML report"""
+    return str(value).translate(HTML_ESCAPE_TABLE)
+
+def iter_report_chunks(report: Dict) -> Iterator[Tuple[str, str]]:
+    """Yield (markdown, html) chunks section by section in one pass over the report
+    Values shared by both formats (titles, authors) are computed once; statistics
+    are already ordered by count in the report.
+    """
+    summary = report['summary']
+    
+    # Title and data summary
+    yield (MD_HEADER_TMPL.format_map(summary),
+           HTML_HEADER_TMPL.format_map(summary) + HTML_SUMMARY_TMPL.format_map(summary))
+    
+    # Category and source statistics
+    for md_title, html_title, stats in (
+        ("## 📁 分类统计\n\n", '<h2>📁 分类统计</h2>\n<div class="stats">', report['statistics']['by_category']),
+        ("\n## 📰 来源统计\n\n", '<h2>📰 来源统计</h2>\n<div class="stats">', report['statistics']['by_source']),
+    ):
+        md_parts = [md_title]
+        html_parts = [html_title]
+        for name, count in stats.items():
+            md_parts.append(f"- **{name}**: {count} 篇\n")
+            html_parts.append(HTML_STAT_CARD_TMPL.format(name=_esc(name), count=count))
+        html_parts.append("</div>\n")
+        yield ''.join(md_parts), ''.join(html_parts)
+    
+    # Article list (one chunk pair per article)
+    yield "\n## 📄 文章详情\n\n---\n\n", "<h2>📄 文章详情</h2>\n"
+    
+    for i, article in enumerate(report['articles'], 1):
+        original = article['original']
+        processed = article['processed']
+        display_title = processed['title_zh'] or original['title']
+        authors = ', '.join(original['authors']) if original['authors'] else ''
+        date_publish = original['date_publish']
+        url = original['url']
+        description_zh = processed['description_zh']
+        key_points = processed['key_points']
+        summary_zh = processed['summary_zh']
+        maintext_zh = processed['maintext_zh']
+        md_parts = []
+        md = md_parts.append
         
-        if processed['maintext_zh']:
-            html.append(f'<div class="content"><strong>正文（中文）</strong>:<br>{processed["maintext_zh"]}</div>')
+        md(MD_ARTICLE_TMPL.format(
+            i=i,
+            display_title=display_title,
+            title=original['title'],
+            category=processed['category'],
+            source_domain=original['source_domain'],
+            authors=authors or '未知',
+            date_publish=date_publish,
+            url=url,
+        ))
+        if description_zh:
+            md(f"\n**描述**:\n{description_zh}\n\n")
+        if key_points:
+            md("\n**关键要点**:\n\n")
+            md("".join(f"- {point}\n" for point in key_points))
+            md("\n")
+        if summary_zh:
+            md(f"\n**摘要**:\n{summary_zh}\n\n")
+        if maintext_zh:
+            md(f"\n**正文（中文）**:\n\n{maintext_zh}\n\n")
+        md("\n---\n\n")
         
-        html.append('</div>')
+        html = HTML_ARTICLE_TMPL.format_map({
+            "i": i,
+            "display_title": _esc(display_title),
+            "category": _esc(processed['category']),
+            "title": _esc(original['title']),
+            "source_domain": _esc(original['source_domain']),
+            "authors": HTML_AUTHORS_TMPL.format(_esc(authors)) if authors else '',
+            "date_publish": HTML_DATE_TMPL.format(_esc(date_publish)) if date_publish else '',
+            "url": HTML_LINK_TMPL.format(_esc(url)) if url else '',
+            "description": HTML_CONTENT_TMPL.format('描述', _esc(description_zh)) if description_zh else '',
+            "key_points": HTML_KEY_POINTS_TMPL.format(
+                "".join(f'<li>{_esc(point)}</li>\n' for point in key_points)) if key_points else '',
+            "summary": HTML_CONTENT_TMPL.format('摘要', _esc(summary_zh)) if summary_zh else '',
+            "maintext": HTML_CONTENT_TMPL.format('正文（中文）', _esc(maintext_zh)) if maintext_zh else '',
+        })
+        yield ''.join(md_parts), html
     
-    # HTML footer
-    html.append("""
-    </div>
-</body>
-</html>
-    """)
+    yield '', HTML_FOOTER
+
+def iter_markdown_report(report: Dict) -> Iterator[str]:
+    """Yield the Markdown report chunk by chunk"""
+    return (md for md, _html in iter_report_chunks(report))
+
+def iter_html_report(report: Dict) -> Iterator[str]:
+    """Yield the HTML report chunk by chunk"""
+    return (html for _md, html in iter_report_chunks(report))
+
+def write_md_and_html(report: Dict, md_out, html_out):
+    """Write the Markdown and HTML reports to text file objects in one pass"""
+    for md_chunk, html_chunk in iter_report_chunks(report):
+        md_out.write(md_chunk)
+        html_out.write(html_chunk)
+
+def generate_md_and_html(report: Dict) -> Tuple[str, str]:
+    """Generate the Markdown and HTML reports as strings (single pass)"""
+    md_buf = io.StringIO()
+    html_buf = io.StringIO()
+    write_md_and_html(report, md_buf, html_buf)
+    return md_buf.getvalue(), html_buf.getvalue()
+
+def generate_markdown_report(report: Dict) -> str:
+    """Generate Markdown format report"""
+    return ''.join(iter_markdown_report(report))
+
+def generate_html_report(report: Dict) -> str:
+    """Generate HTML format report"""
+    return ''.join(iter_html_report(report))
+
+def _write_md_and_html_files(md_path: str, html_path: str, report: Dict):
+    """Stream both reports to disk in one pass through 1MB buffers, not built in memory
+    Chunks are encoded once and written to binary files, skipping the text-mode encoder layer.
+    """
+    with atomic_open(md_path, 'wb', buffering=REPORT_WRITE_BUFFER) as md_f, \
+         atomic_open(html_path, 'wb', buffering=REPORT_WRITE_BUFFER) as html_f:
+        md_write = md_f.write
+        html_write = html_f.write
+        for md_chunk, html_chunk in iter_report_chunks(report):
+            md_write(md_chunk.encode('utf-8'))
+            html_write(html_chunk.encode('utf-8'))
+
+def _gzip_file(path: str) -> str:
+    """Write a fast (level 1) gzip copy next to path and return its name"""
+    gz_path = path + '.gz'
+    with open(path, 'rb') as src, atomic_open(gz_path, 'wb') as raw, \
+         gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=1) as dst:
+        shutil.copyfileobj(src, dst, REPORT_WRITE_BUFFER)
+    return gz_path
+
+def _build_basic(article: Dict, now_iso: str) -> Dict:
+    """Basic processing (no AI): keep the original article, valid if it has main text"""
+    return {
+        "original": _build_original(article),
+        "processed": {
+            "is_valid": bool(article.get('maintext')),
+            "category": "其他",
+            "key_points": [],
+            "title_zh": "",
+            "description_zh": "",
+            "summary_zh": "",
+            "maintext_zh": "",
+        },
+        "metadata": {
+            "processed_at": now_iso,
+            "source": "basic"
+        }
+    }
+
+def _is_too_short(article: Dict) -> bool:
+    """Whether the main text is too short to be worth an AI request"""
+    return len(article.get('maintext') or '') < MIN_MAINTEXT_LENGTH
+
+def _build_too_short(article: Dict, now_iso: str) -> Dict:
+    """Result for an article skipped before AI processing because its main text is too short"""
+    maintext_len = len(article.get('maintext') or '')
+    return {
+        "original": _build_original(article),
+        "processed": {
+            "is_valid": False,
+            "category": "其他",
+            "key_points": [],
+            "title_zh": article.get('title', ''),
+            "description_zh": article.get('description') or "",
+            "summary_zh": f"文章内容过短（{maintext_len} 字符），未进行AI处理",
+            "maintext_zh": "",
+        },
+        "metadata": {
+            "processed_at": now_iso,
+            "source": "too_short",
+            "filtered_reason": f"正文少于 {MIN_MAINTEXT_LENGTH} 字符"
+        }
+    }
+
+def _process_article_task(ai_client: AIClient, article: Dict, rate_limiter: RateLimiter, label: str, now_iso: str) -> Optional[Dict]:
+    """Worker: process one article with AI (requests wait for the rate limiter)"""
+    log.info(f"\n{label} 处理: {article.get('title', '无标题')[:50]}...")
     
-    return "\n".join(html)
+    # Debug: Check article content
+    log.debug(f"  文章内容长度: {len(article.get('maintext') or '')} 字符")
+    
+    return process_article_with_ai(ai_client, article, now_iso, rate_limiter)
+
+def _process_batch_task(ai_client: AIClient, batch: List[Tuple[str, Dict]], rate_limiter: RateLimiter, now_iso: str) -> List[Optional[Dict]]:
+    """Worker: process a batch of (label, article) with one AI request, falling back to one request per article"""
+    if len(batch) > 1:
+        labels = ', '.join(label for label, _article in batch)
+        log.info(f"\n{labels} 批量处理 {len(batch)} 篇...")
+        results = process_articles_batch(ai_client, [article for _label, article in batch], now_iso, rate_limiter)
+        if results is not None:
+            return results
+    return [_process_article_task(ai_client, article, rate_limiter, label, now_iso) for label, article in batch]
 
 def main():
     """Main function"""
+    _setup_logging()
     print("=" * 60)
     print("AI新闻处理与报告生成")
     print("=" * 60)
@@ -794,7 +1251,7 @@ def main():
             return
     
     try:
-        ai_client = AIClient(current_provider)
+        ai_client = AIClient(current_provider, pool_size=AI_CONCURRENCY)
         print(f"✓ AI客户端初始化成功: {ai_client.provider} ({ai_client.model_name})")
     except Exception as e:
         print(f"\n❌ AI客户端初始化失败: {e}")
@@ -813,102 +1270,112 @@ def main():
     today = datetime.now().strftime("%Y%m%d")
     report_date_dir = os.path.join(REPORT_DIR, today)
     os.makedirs(report_date_dir, exist_ok=True)
-    cache_file = os.path.join(report_date_dir, 'processed_cache.json')
+    cache_file = os.path.join(report_date_dir, 'processed_cache.jsonl')
     
     # Load processed article cache (resume from breakpoint)
     print(f"\n📋 检查已处理缓存...")
     processed_cache = load_processed_cache(cache_file)
+    cache_writer = CacheWriter(cache_file)
     if processed_cache:
         print(f"  ✓ 发现 {len(processed_cache)} 篇已处理文章，将跳过这些文章")
     
     # Process articles
     print(f"\n🤖 使用AI处理文章...")
-    processed_articles = []
+    total = len(articles)
+    accumulator = ReportAccumulator()
+    now_iso = datetime.now().isoformat()  # One processed_at timestamp for the whole batch
     save_interval = 5  # Save intermediate results every 5 articles
     skipped_count = 0
+    duplicate_count = 0
+    new_processed_count = 0
     
     try:
+        pending = []
+        seen_ids = set()
         for i, article in enumerate(articles, 1):
             article_id = get_article_id(article)
             
+            # The same article linked from several homepages is only processed once
+            if article_id in seen_ids:
+                log.info(f"\n[{i}/{total}] ⏭️  跳过（重复）: {article.get('title', '无标题')[:50]}...")
+                duplicate_count += 1
+                continue
+            seen_ids.add(article_id)
+            
             # Check if already processed (resume from breakpoint)
             if article_id in processed_cache:
-                print(f"\n[{i}/{len(articles)}] ⏭️  跳过（已处理）: {article.get('title', '无标题')[:50]}...")
-                processed_articles.append(processed_cache[article_id])
+                log.info(f"\n[{i}/{total}] ⏭️  跳过（已处理）: {article.get('title', '无标题')[:50]}...")
+                cached = processed_cache[article_id]
+                if cached['original'].get('maintext') is None:
+                    cached['original']['maintext'] = article.get('maintext', '')
+                accumulator.add(i, cached)
                 skipped_count += 1
-                continue
-            
-            print(f"\n[{i}/{len(articles)}] 处理: {article.get('title', '无标题')[:50]}...")
-            
-            # Debug: Check article content
-            maintext_len = len(article.get('maintext', ''))
-            print(f"  文章内容长度: {maintext_len} 字符")
-            if maintext_len < 100:
-                print(f"  ⚠️  警告: 文章内容过短，可能影响处理结果")
-            
-            if ai_client:
-                processed = process_article_with_ai(ai_client, article)
-                if processed:
-                    processed_articles.append(processed)
-                    # Immediately save to cache (resume from breakpoint)
-                    processed_cache[article_id] = processed
-                    save_processed_cache(cache_file, processed_cache)
-                    
-                    # Save intermediate results every N articles
-                    new_processed_count = len(processed_articles) - skipped_count
-                    if new_processed_count > 0 and new_processed_count % save_interval == 0:
-                        print(f"  💾 保存中间结果（已处理 {len(processed_articles)} 篇，其中新处理 {new_processed_count} 篇）...")
-                        save_intermediate_results(processed_articles, report_date_dir)
-                    
-                    if processed['processed']['is_valid']:
-                        content_len = len(processed['processed'].get('maintext_zh', ''))
-                        print(f"  ✓ 有效文章 - 分类: {processed['processed']['category']}")
-                        print(f"  中文内容长度: {content_len} 字符")
-                        if content_len == 0:
-                            print(f"  ⚠️  警告: 中文内容为空，可能AI处理失败")
-                    else:
-                        print(f"  ✗ 无效文章（已过滤）")
-                else:
-                    print(f"  ⚠️  处理失败")
-                    # Check if it's an insufficient balance error, if so, prompt user
-                    if i == 1:  # Only prompt on first article failure
-                        print(f"\n💡 提示: 如果看到'余额不足'错误，可以：")
-                        print(f"   1. 为当前AI提供商充值")
-                        print(f"   2. 切换到其他可用提供商: export AI_PROVIDER='gemini' 或 'tongyi'")
-                        print(f"   3. 查看可用提供商: python -c 'from config import config; config.print_status()'")
-                
-                # Add delay to avoid API rate limiting
-                time.sleep(1)
+            elif ai_client and _is_too_short(article):
+                # Not worth an AI request: record it as invalid right away
+                log.info(f"\n[{i}/{total}] ⏭️  跳过（内容过短）: {article.get('title', '无标题')[:50]}...")
+                processed = _build_too_short(article, now_iso)
+                accumulator.add(i, processed)
+                cache_writer.add(article_id, processed)
+            elif ai_client:
+                pending.append((i, article_id, article))
             else:
                 # If no AI model, use basic processing
-                processed = {
-                    "original": {
-                        "title": article.get('title', ''),
-                        "description": article.get('description', ''),
-                        "maintext": article.get('maintext', ''),
-                        "authors": article.get('authors', []),
-                        "date_publish": article.get('date_publish', ''),
-                        "source_domain": article.get('source_domain', ''),
-                        "url": article.get('url', ''),
-                        "homepage_source": article.get('homepage_source', ''),
-                    },
-                    "processed": {
-                        "is_valid": bool(article.get('maintext')),
-                        "category": "其他",
-                        "key_points": [],
-                        "title_zh": "",
-                        "description_zh": "",
-                        "summary_zh": "",
-                        "maintext_zh": "",
-                    },
-                    "metadata": {
-                        "processed_at": datetime.now().isoformat(),
-                        "source": "basic"
-                    }
-                }
-                processed_articles.append(processed)
-                processed_cache[article_id] = processed
-                save_processed_cache(cache_file, processed_cache)
+                processed = _build_basic(article, now_iso)
+                accumulator.add(i, processed)
+                cache_writer.add(article_id, processed)
+        
+        if duplicate_count:
+            print(f"\n  ✓ 移除 {duplicate_count} 篇重复文章")
+        
+        if pending:
+            print(f"\n  并发数: {AI_CONCURRENCY}，速率限制: {AI_RATE_LIMIT} 次/秒，每次请求: {AI_BATCH_SIZE} 篇，待处理: {len(pending)} 篇")
+            rate_limiter = RateLimiter(AI_RATE_LIMIT)
+            failure_hint_shown = False
+            with ThreadPoolExecutor(max_workers=AI_CONCURRENCY) as executor:
+                futures = {}
+                for start in range(0, len(pending), AI_BATCH_SIZE):
+                    chunk = pending[start:start + AI_BATCH_SIZE]
+                    batch = [(f"[{i}/{total}]", article) for i, _article_id, article in chunk]
+                    future = executor.submit(_process_batch_task, ai_client, batch, rate_limiter, now_iso)
+                    futures[future] = [(i, article_id) for i, article_id, _article in chunk]
+                try:
+                    # Cache and save each article as soon as its batch finishes
+                    for future in as_completed(futures):
+                        for (i, article_id), processed in zip(futures[future], future.result()):
+                            label = f"[{i}/{total}]"
+                            if processed:
+                                accumulator.add(i, processed)
+                                # Queue for the cache (resume from breakpoint)
+                                cache_writer.add(article_id, processed)
+                                
+                                # Save intermediate results every N articles
+                                new_processed_count += 1
+                                if new_processed_count % save_interval == 0:
+                                    log.info(f"  💾 保存中间结果（已处理 {accumulator.total} 篇，其中新处理 {new_processed_count} 篇）...")
+                                    save_intermediate_results(accumulator, report_date_dir, include_articles=False)
+                                
+                                if processed['processed']['is_valid']:
+                                    content_len = len(processed['processed'].get('maintext_zh', ''))
+                                    log.info(f"  {label} ✓ 有效文章 - 分类: {processed['processed']['category']}")
+                                    log.debug(f"  {label} 中文内容长度: {content_len} 字符")
+                                    if content_len == 0:
+                                        log.warning(f"  ⚠️  警告: 中文内容为空，可能AI处理失败")
+                                else:
+                                    log.info(f"  {label} ✗ 无效文章（已过滤）")
+                            else:
+                                log.warning(f"  {label} ⚠️  处理失败")
+                                # Check if it's an insufficient balance error, if so, prompt user
+                                if not failure_hint_shown:  # Only prompt on first failure
+                                    failure_hint_shown = True
+                                    print(f"\n💡 提示: 如果看到'余额不足'错误，可以：")
+                                    print(f"   1. 为当前AI提供商充值")
+                                    print(f"   2. 切换到其他可用提供商: export AI_PROVIDER='gemini' 或 'tongyi'")
+                                    print(f"   3. 查看可用提供商: python -c 'from config import config; config.print_status()'")
+                except BaseException:
+                    # Don't start queued articles after an interrupt or error
+                    for future in futures:
+                        future.cancel()
+                    raise
     
     except KeyboardInterrupt:
         print("\n\n⚠️  用户中断，保存已处理的结果...")
@@ -917,58 +1384,64 @@ def main():
         print("💾 尝试保存已处理的结果...")
     finally:
         # Save processed results regardless of exceptions
-        if processed_articles:
-            print(f"\n💾 保存最终结果（共 {len(processed_articles)} 篇，其中跳过 {skipped_count} 篇）...")
-            save_intermediate_results(processed_articles, report_date_dir)
+        cache_writer.close()
+        if accumulator.total:
+            print(f"\n💾 保存最终结果（共 {accumulator.total} 篇，其中跳过 {skipped_count} 篇）...")
+            save_intermediate_results(accumulator, report_date_dir)
     
     # Generate final report (using processed results)
-    if not processed_articles:
+    if not accumulator.total:
         print("\n⚠️  没有已处理的文章，无法生成报告")
         return
     
     print(f"\n📊 生成最终报告...")
-    report = generate_report(processed_articles)
-    
-    # Save JSON report
-    report_json_file = os.path.join(report_date_dir, 'report.json')
-    with open(report_json_file, 'w', encoding='utf-8') as f:
-        json.dump(report, f, ensure_ascii=False, indent=2)
-    print(f"✓ JSON报告已保存: {report_json_file}")
-    
-    # Generate and save Markdown report
-    md_report = generate_markdown_report(report)
-    report_md_file = os.path.join(report_date_dir, 'report.md')
-    with open(report_md_file, 'w', encoding='utf-8') as f:
-        f.write(md_report)
-    print(f"✓ Markdown报告已保存: {report_md_file}")
-    
-    # Generate and save HTML report
-    html_report = generate_html_report(report)
-    report_html_file = os.path.join(report_date_dir, 'report.html')
-    with open(report_html_file, 'w', encoding='utf-8') as f:
-        f.write(html_report)
-    print(f"✓ HTML报告已保存: {report_html_file}")
+    report = accumulator.snapshot()
+    
+    # Output paths
+    join = os.path.join
+    report_json_file = join(report_date_dir, 'report.json')
+    report_md_file = join(report_date_dir, 'report.md')
+    report_html_file = join(report_date_dir, 'report.html')
+    intermediate_file = join(report_date_dir, 'report_intermediate.json')
+    
+    # Save the JSON report concurrently with the Markdown/HTML pass (independent files, I/O overlaps)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = {
+            executor.submit(_write_json, report_json_file, report): (('JSON', report_json_file),),
+            executor.submit(_write_md_and_html_files, report_md_file, report_html_file, report): (
+                ('Markdown', report_md_file), ('HTML', report_html_file)),
+        }
+        for future in as_completed(futures):
+            future.result()
+            for name, path in futures[future]:
+                print(f"✓ {name}报告已保存: {path}")
+    
+    if os.path.getsize(report_html_file) > HTML_GZIP_THRESHOLD:
+        print(f"✓ HTML压缩副本已保存: {_gzip_file(report_html_file)}")
     
     # Clean up intermediate result files (keep final reports)
-    intermediate_file = os.path.join(report_date_dir, 'report_intermediate.json')
-    if os.path.exists(intermediate_file):
-        try:
-            os.remove(intermediate_file)
-            print(f"✓ 已清理中间结果文件")
-        except:
-            pass
-    
-    # Print summary
-    print(f"\n" + "=" * 60)
-    print("处理完成！")
-    print("=" * 60)
-    print(f"总文章数: {report['summary']['total_articles']}")
-    print(f"有效文章: {report['summary']['valid_articles']}")
-    print(f"无效文章: {report['summary']['invalid_articles']}")
-    print(f"\n分类统计:")
-    for category, count in sorted(report['statistics']['by_category'].items(), 
-                                  key=lambda x: x[1], reverse=True):
-        print(f"  {category}: {count} 篇")
+    try:
+        os.remove(intermediate_file)
+        print(f"✓ 已清理中间结果文件")
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"⚠️  清理中间结果文件失败: {e}")
+    
+    # Print summary (built as one string, written with a single stdout call)
+    summary = report['summary']
+    by_category = report['statistics']['by_category']
+    parts = [
+        "\n" + "=" * 60,
+        "处理完成！",
+        "=" * 60,
+        f"总文章数: {summary['total_articles']}",
+        f"有效文章: {summary['valid_articles']}",
+        f"无效文章: {summary['invalid_articles']}",
+        "\n分类统计:",
+    ]
+    parts.extend(f"  {category}: {count} 篇" for category, count in by_category.items())
+    sys.stdout.write("\n".join(parts) + "\n")
 
 if __name__ == '__main__':
     main()
@@ -4,50 +4,137 @@ Complete workflow for news crawling and AI processing
 Chains together crawl.py and process_with_ai.py functionality
 """
 
+import atexit
 import os
 import sys
 import subprocess
+import threading
 from datetime import datetime
-import time
+from typing import Optional
+
+# Log file buffer: many prints are collected into few write syscalls.
+# Anything that reads the log mid-run (the email attachment) must flush sys.stdout first
+LOG_BUFFER_SIZE = 1 << 16
+# TeeOutput coalesces writes and passes them on once this many characters
+# are pending or TEE_FLUSH_INTERVAL seconds have passed
+TEE_BUFFER_SIZE = 8192
+TEE_FLUSH_INTERVAL = 0.05
 
 class TeeOutput:
-    """Class to output to both terminal and file simultaneously"""
+    """Class to output to both terminal and file simultaneously
+    Writes are collected and handed to both sinks in one combined write, by
+    size, on flush(), or from a background thread after TEE_FLUSH_INTERVAL so
+    neither the terminal nor the log file on disk lags behind.
+    """
     def __init__(self, file_path):
         self.terminal = sys.stdout
-        self.log_file = open(file_path, 'w', encoding='utf-8')
+        self.log_file = open(file_path, 'w', encoding='utf-8', buffering=LOG_BUFFER_SIZE)
+        self.pending = []
+        self.pending_len = 0
+        self.lock = threading.Lock()
+        self.closed = threading.Event()
+        self.flusher = threading.Thread(target=self._flush_loop, name='tee-flush', daemon=True)
+        self.flusher.start()
+        # Make sure buffered log lines reach the file even on unusual exits
+        atexit.register(self.close)
     
     def write(self, message):
-        self.terminal.write(message)
+        with self.lock:
+            self.pending.append(message)
+            self.pending_len += len(message)
+            if self.pending_len >= TEE_BUFFER_SIZE:
+                self._drain()
+    
+    def _drain(self) -> bool:
+        """Hand pending text to both sinks (caller holds the lock); True if anything was written"""
+        if not self.pending:
+            return False
+        text = ''.join(self.pending)
+        self.pending.clear()
+        self.pending_len = 0
+        self.terminal.write(text)
         self.terminal.flush()
-        self.log_file.write(message)
-        self.log_file.flush()
+        self.log_file.write(text)
+        return True
+    
+    def _flush_loop(self):
+        while not self.closed.wait(TEE_FLUSH_INTERVAL):
+            with self.lock:
+                # Also push the log file's buffer to disk, but only after new output (idle ticks cost nothing)
+                if self._drain():
+                    self.log_file.flush()
     
     def flush(self):
-        self.terminal.flush()
-        self.log_file.flush()
+        with self.lock:
+            self._drain()
+            self.terminal.flush()
+            if not self.log_file.closed:
+                self.log_file.flush()
     
     def close(self):
-        if self.log_file:
+        if self.closed.is_set():
+            return
+        self.closed.set()
+        self.flusher.join()
+        with self.lock:
+            self._drain()
             self.log_file.close()
 
+def start_weather_prefetch() -> Optional[threading.Thread]:
+    """Fetch the email greeting's weather data in the background while the crawl runs
+    fetch_weather memoizes and disk-caches the result, so the greeting generated after a
+    successful run reads it without waiting. The greeting's AI call is not prefetched: it is
+    only made once a report exists. Daemon thread, so a run without a report never waits on it.
+    """
+    if not all(os.getenv(key) for key in ('SMTP_USER', 'SMTP_PASSWORD', 'EMAIL_TO')):
+        return None
+    try:
+        from weather import fetch_weather
+    except ImportError:
+        return None
+    
+    def warm():
+        try:
+            fetch_weather()
+        except Exception:
+            pass  # The greeting fetches again and reports the failure itself
+    
+    thread = threading.Thread(target=warm, name='weather-prefetch', daemon=True)
+    thread.start()
+    return thread
+
 def run_crawl():
     """Execute crawler script"""
     print("=" * 60)
     print("步骤 1/2: 新闻爬取")
     print("=" * 60)
     
+    # CRAWL_SUBPROCESS=1 runs crawl.py in its own interpreter (isolated from this process)
+    if os.getenv('CRAWL_SUBPROCESS') == '1':
+        try:
+            subprocess.run(
+                [sys.executable, 'crawl.py'],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                check=True,
+                capture_output=False
+            )
+            print("\n✓ 爬取完成")
+            return True
+        except subprocess.CalledProcessError as e:
+            print(f"\n❌ 爬取失败: {e}")
+            return False
+        except Exception as e:
+            print(f"\n❌ 爬取过程出错: {e}")
+            return False
+    
     try:
-        # Directly execute crawl.py
-        result = subprocess.run(
-            [sys.executable, 'crawl.py'],
-            cwd=os.path.dirname(os.path.abspath(__file__)),
-            check=True,
-            capture_output=False
-        )
+        # Import and execute main function from crawl (no extra interpreter start-up)
+        from crawl import main as crawl_main
+        crawl_main()
         print("\n✓ 爬取完成")
         return True
-    except subprocess.CalledProcessError as e:
-        print(f"\n❌ 爬取失败: {e}")
+    except ImportError as e:
+        print(f"\n❌ 导入 crawl 失败: {e}")
         return False
     except Exception as e:
         print(f"\n❌ 爬取过程出错: {e}")
@@ -100,15 +187,14 @@ def main():
         print(f"日志文件: {log_file_path}")
         print()
         
+        weather_prefetch = start_weather_prefetch()
+        
         # Step 1: Crawl news
         crawl_success = run_crawl()
         
         if not crawl_success:
             print("\n⚠️  爬取失败，但继续尝试AI处理（如果有已存在的文章文件）...")
         
-        # Wait a short time to ensure file is written
-        time.sleep(2)
-        
         # Step 2: AI processing
         ai_success = run_ai_processing()
         
@@ -129,11 +215,16 @@ def main():
             print("\n生成的文件：")
             today = datetime.now().strftime("%Y%m%d")
             report_dir = os.path.join('report', today)
-            if os.path.exists(report_dir):
+            # One directory listing instead of a stat per report file
+            try:
+                with os.scandir(report_dir) as it:
+                    existing = {entry.name for entry in it}
+            except OSError:
+                existing = None
+            if existing is not None:
                 print(f"  📁 报告目录: {report_dir}/")
                 for file in ['report.json', 'report.md', 'report.html']:
-                    filepath = os.path.join(report_dir, file)
-                    if os.path.exists(filepath):
+                    if file in existing:
                         print(f"     ✓ {file}")
             print(f"\n📝 完整日志已保存到: {log_file_path}")
             exit_code = 0
@@ -156,6 +247,12 @@ def main():
             print("\n" + "=" * 60)
             print("📧 发送邮件通知")
             print("=" * 60)
+            # With a fresh report the greeting will be generated: let it find the weather already cached
+            if ai_success and weather_prefetch is not None:
+                weather_prefetch.join()
+            # The run log is attached to the email: push everything printed so far onto disk first
+            sys.stdout.flush()
+            # The greeting (an AI call) is generated inside, only once a report has been found
             send_report_email()
         except ImportError:
             print("\n⚠️  邮件发送模块未找到，跳过邮件发送")
@@ -5,21 +5,41 @@ Automatically send email after run.py execution completes
 """
 
 import os
+import copy
+import gzip
 import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
 from email import encoders
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from email.message import EmailMessage, Message
 from datetime import datetime
 from zoneinfo import ZoneInfo
-import glob
+from typing import Dict, List, Optional
 
 # Nigeria timezone (Africa/Lagos, UTC+1)
 NIGERIA_TZ = ZoneInfo('Africa/Lagos')
 EMAIL_TEMPLATE_FILE = os.getenv('EMAIL_TEMPLATE_FILE', 'email_template.txt')
 
+DEFAULT_GREETING = "你好！"
+
+# Attachments are read in parallel (file I/O releases the GIL)
+ATTACHMENT_WORKERS = 4
+
+# Text attachments keep a readable MIME type and skip base64's ~33% overhead when their lines fit SMTP limits
+TEXT_ATTACHMENT_TYPES = {
+    '.json': ('application', 'json'),
+    '.md': ('text', 'markdown'),
+}
+SMTP_MAX_LINE_LENGTH = 998
+
+# Run logs are large and highly repetitive, so they are gzipped in memory and sent as <name>.gz
+GZIP_ATTACHMENT_EXTS = {'.log'}
+GZIP_ATTACHMENT_LEVEL = 6
+
 def get_greeting():
-    """Get greeting based on Nigeria time, with weather information"""
+    """Get greeting based on Nigeria time, with weather information
+    Falls back to the default greeting if generation fails.
+    """
     try:
         # Import greeting generator
         from greeting import generate_greeting
@@ -40,7 +60,7 @@ def get_greeting():
         # Fallback if greeting module is not available
         print("  ⚠️  问候语生成模块未找到，使用默认问候语")
         return {
-            'greeting': "你好！",
+            'greeting': DEFAULT_GREETING,
             'weather_summary': '',
             'weather_advice': ''
         }
@@ -48,21 +68,70 @@ def get_greeting():
         # Fallback on any error
         print(f"  ⚠️  生成问候语时出错: {str(e)[:50]}，使用默认问候语")
         return {
-            'greeting': "你好！",
+            'greeting': DEFAULT_GREETING,
             'weather_summary': '',
             'weather_advice': ''
         }
 
-def load_email_template():
-    """Load email template from file"""
+# Encoded attachment parts keyed by (path, mtime, size), so a file is read and encoded once
+_attachment_cache: Dict[tuple, EmailMessage] = {}
+
+def _text_transfer_encoding(data: bytes) -> Optional[str]:
+    """7bit/8bit when the UTF-8 text can go on the wire as-is, None otherwise (falls back to base64)"""
     try:
-        if os.path.exists(EMAIL_TEMPLATE_FILE):
-            with open(EMAIL_TEMPLATE_FILE, 'r', encoding='utf-8') as f:
-                return f.read().strip()
-        else:
-            # Fallback to default template if file doesn't exist
-            print(f"⚠️  邮件模板文件不存在: {EMAIL_TEMPLATE_FILE}，使用默认模板")
-            return """{greeting}
+        data.decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+    lines = data.splitlines()
+    if b'\r' in data or max((len(line) for line in lines), default=0) > SMTP_MAX_LINE_LENGTH:
+        return None
+    return '7bit' if data.isascii() else '8bit'
+
+def build_attachment(filepath: str) -> EmailMessage:
+    """Attachment part for a file (read and encoded once, a fresh copy per message)
+    Known text files are sent unencoded with their own MIME type, logs gzipped, everything else as base64 octet-stream.
+    """
+    stat = os.stat(filepath)
+    key = (filepath, stat.st_mtime_ns, stat.st_size)
+    part = _attachment_cache.get(key)
+    if part is None:
+        with open(filepath, 'rb') as f:
+            data = f.read()
+        filename = os.path.basename(filepath)
+        ext = os.path.splitext(filename)[1].lower()
+        maintype, subtype = 'application', 'octet-stream'
+        cte = 'base64'
+        text_type = TEXT_ATTACHMENT_TYPES.get(ext)
+        if ext in GZIP_ATTACHMENT_EXTS:
+            data = gzip.compress(data, compresslevel=GZIP_ATTACHMENT_LEVEL)
+            subtype = 'gzip'
+            filename += '.gz'
+        elif text_type:
+            text_cte = _text_transfer_encoding(data)
+            if text_cte:
+                (maintype, subtype), cte = text_type, text_cte
+        part = EmailMessage()
+        part.set_content(data, maintype=maintype, subtype=subtype, cte=cte,
+                         disposition='attachment', filename=filename)
+        if maintype == 'text':
+            part.set_param('charset', 'utf-8')
+        _attachment_cache[key] = part
+    return copy.deepcopy(part)
+
+def find_latest_log(log_dir: str = 'log') -> Optional[str]:
+    """Newest log/run_*.log by ctime, found in a single scandir pass"""
+    try:
+        with os.scandir(log_dir) as it:
+            latest = max(
+                (e for e in it if e.name.startswith('run_') and e.name.endswith('.log') and e.is_file()),
+                key=lambda e: e.stat().st_ctime_ns,
+                default=None,
+            )
+    except OSError:
+        return None
+    return latest.path if latest else None
+
+DEFAULT_EMAIL_TEMPLATE = """{greeting}
 
 今日新闻处理完成！
 
@@ -76,25 +145,59 @@ def load_email_template():
 {log_file_info}
 
 所有文件已作为附件发送。"""
-    except Exception as e:
-        print(f"⚠️  加载邮件模板失败: {e}，使用默认模板")
-        return """{greeting}
 
-今日新闻处理完成！
+@lru_cache(maxsize=4)
+def _read_email_template(path: str, mtime_ns: int) -> str:
+    """Template file contents; mtime_ns is part of the cache key so edits are picked up"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read().strip()
 
-日期: {date}
-时间: {time}
-{weather_section}
-
-报告文件:
-{report_files}
+def load_email_template():
+    """Load email template from file (re-read only when the file changes)"""
+    try:
+        mtime_ns = os.stat(EMAIL_TEMPLATE_FILE).st_mtime_ns
+    except FileNotFoundError:
+        # Fallback to default template if file doesn't exist
+        print(f"⚠️  邮件模板文件不存在: {EMAIL_TEMPLATE_FILE}，使用默认模板")
+        return DEFAULT_EMAIL_TEMPLATE
+    try:
+        return _read_email_template(EMAIL_TEMPLATE_FILE, mtime_ns)
+    except Exception as e:
+        print(f"⚠️  加载邮件模板失败: {e}，使用默认模板")
+        return DEFAULT_EMAIL_TEMPLATE
 
-{log_file_info}
+def _eight_bit_parts(message: Message) -> List[Message]:
+    """Parts sent with Content-Transfer-Encoding: 8bit (need the server's 8BITMIME support)"""
+    return [part for part in message.walk()
+            if not part.is_multipart() and part.get('Content-Transfer-Encoding', '').lower() == '8bit']
 
-所有文件已作为附件发送。"""
+def send_messages(smtp_host: str, smtp_port: int, smtp_user: str, smtp_password: str, messages: List[Message]):
+    """Send messages over one SMTP connection (TLS handshake and login happen once)
+    8bit parts are declared with BODY=8BITMIME when the server advertises it,
+    otherwise they are re-encoded as base64 in place (RFC 6152).
+    The connection is closed even if login or sending fails.
+    """
+    with smtplib.SMTP(smtp_host, smtp_port) as server:
+        server.starttls()
+        server.login(smtp_user, smtp_password)
+        supports_8bit = server.has_extn('8bitmime')
+        for message in messages:
+            eight_bit_parts = _eight_bit_parts(message)
+            mail_options = []
+            if eight_bit_parts:
+                if supports_8bit:
+                    mail_options.append('BODY=8BITMIME')
+                else:
+                    for part in eight_bit_parts:
+                        del part['Content-Transfer-Encoding']
+                        encoders.encode_base64(part)
+            server.send_message(message, mail_options=mail_options)
 
-def send_report_email():
-    """Send report email"""
+def send_report_email(greeting_data: Optional[Dict] = None):
+    """Send report email
+    greeting_data: greeting prepared in advance; otherwise generated here, only after
+    the configuration and report files have been checked
+    """
     # Read configuration from environment variables
     smtp_host = os.getenv('SMTP_HOST', 'smtp.gmail.com')
     smtp_port = int(os.getenv('SMTP_PORT', '587'))
@@ -116,7 +219,11 @@ def send_report_email():
     today = datetime.now().strftime("%Y%m%d")
     report_dir = f'report/{today}'
     
-    if not os.path.exists(report_dir):
+    # List the report directory once instead of stat-ing every file
+    try:
+        with os.scandir(report_dir) as it:
+            existing = {entry.name for entry in it}
+    except OSError:
         print(f"⚠️  报告目录不存在: {report_dir}")
         return False
     
@@ -127,7 +234,7 @@ def send_report_email():
         'md': f'{report_dir}/report.md',
     }
     
-    existing_files = {k: v for k, v in report_files.items() if os.path.exists(v)}
+    existing_files = {k: v for k, v in report_files.items() if f'report.{k}' in existing}
     
     if not existing_files:
         print(f"⚠️  报告目录中没有找到报告文件: {report_dir}")
@@ -138,10 +245,11 @@ def send_report_email():
     
     # Get current time in Nigeria timezone
     now_nigeria = datetime.now(NIGERIA_TZ)
-    greeting_data = get_greeting()
+    if greeting_data is None:
+        greeting_data = get_greeting()
     
     # Extract greeting and weather info
-    greeting = greeting_data.get('greeting', '你好！') if isinstance(greeting_data, dict) else greeting_data
+    greeting = greeting_data.get('greeting', DEFAULT_GREETING) if isinstance(greeting_data, dict) else greeting_data
     weather_summary = greeting_data.get('weather_summary', '') if isinstance(greeting_data, dict) else ''
     weather_advice = greeting_data.get('weather_advice', '') if isinstance(greeting_data, dict) else ''
     
@@ -155,13 +263,8 @@ def send_report_email():
     report_files_text = "\n".join(report_files_list) if report_files_list else "  (无)"
     
     # Add log file information
-    log_files = glob.glob('log/run_*.log')
-    log_file_info = ""
-    if log_files:
-        latest_log = max(log_files, key=os.path.getctime)
-        log_file_info = f"日志文件: {os.path.basename(latest_log)}"
-    else:
-        log_file_info = ""
+    latest_log = find_latest_log()
+    log_file_info = f"日志文件: {os.path.basename(latest_log)}" if latest_log else ""
     
     # Format weather section
     weather_section = ""
@@ -185,49 +288,31 @@ def send_report_email():
         print(f"  🌤️  已包含天气信息")
     
     # Create email
-    msg = MIMEMultipart()
+    msg = EmailMessage()
     msg['From'] = smtp_user
     msg['To'] = email_to_clean  # Multiple emails separated by comma
     msg['Subject'] = f'每日新闻报告 - {now_nigeria.strftime("%Y-%m-%d")}'
     
-    msg.attach(MIMEText(body, 'plain', 'utf-8'))
+    msg.set_content(body, charset='utf-8', cte='base64')
+    msg.make_mixed()
+    
+    # Add attachments (report files and latest log file), read and encoded concurrently
+    attachment_files = list(existing_files.values())
+    if latest_log:
+        attachment_files.append(latest_log)
+    with ThreadPoolExecutor(max_workers=ATTACHMENT_WORKERS) as executor:
+        futures = [executor.submit(build_attachment, filepath) for filepath in attachment_files]
     
-    # Add attachments
     attachments_added = 0
-    for name, filepath in existing_files.items():
+    for filepath, future in zip(attachment_files, futures):
         try:
-            with open(filepath, 'rb') as f:
-                part = MIMEBase('application', 'octet-stream')
-                part.set_payload(f.read())
-                encoders.encode_base64(part)
-                part.add_header(
-                    'Content-Disposition',
-                    f'attachment; filename= {os.path.basename(filepath)}'
-                )
-                msg.attach(part)
-                attachments_added += 1
-                print(f"  ✓ 添加附件: {os.path.basename(filepath)}")
+            part = future.result()
+            msg.attach(part)
+            attachments_added += 1
+            print(f"  ✓ 添加附件: {part.get_filename()}")
         except Exception as e:
             print(f"  ⚠️  添加附件失败 {filepath}: {e}")
     
-    # Add latest log file
-    if log_files:
-        latest_log = max(log_files, key=os.path.getctime)
-        try:
-            with open(latest_log, 'rb') as f:
-                part = MIMEBase('application', 'octet-stream')
-                part.set_payload(f.read())
-                encoders.encode_base64(part)
-                part.add_header(
-                    'Content-Disposition',
-                    f'attachment; filename= {os.path.basename(latest_log)}'
-                )
-                msg.attach(part)
-                attachments_added += 1
-                print(f"  ✓ 添加附件: {os.path.basename(latest_log)}")
-        except Exception as e:
-            print(f"  ⚠️  添加日志文件失败: {e}")
-    
     if attachments_added == 0:
         print("  ⚠️  没有可附加的文件")
         return False
@@ -235,11 +320,7 @@ def send_report_email():
     # Send email
     try:
         print(f"  🔄 连接到邮件服务器: {smtp_host}:{smtp_port}")
-        server = smtplib.SMTP(smtp_host, smtp_port)
-        server.starttls()
-        server.login(smtp_user, smtp_password)
-        server.send_message(msg)
-        server.quit()
+        send_messages(smtp_host, smtp_port, smtp_user, smtp_password, [msg])
         print(f"  ✓ 邮件已成功发送到: {email_to_clean}")
         return True
     except smtplib.SMTPAuthenticationError as e:
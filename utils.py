@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the news scripts
+On-disk cache location, atomic file writes and JSON (de)serialization
+"""
+
+import os
+import json
+import contextlib
+
+# Optional: orjson is much faster for JSON (de)serialization and works on UTF-8 bytes directly
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Root of the on-disk caches (weather responses, AI responses); each cache keeps to its own prefix or subdirectory
+CACHE_DIR = os.getenv('DNR_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'daily-news'))
+
+@contextlib.contextmanager
+def atomic_open(path: str, mode: str = 'w', **kwargs):
+    """Write to a temporary file next to path and move it over path only after it is complete,
+    so readers never see a partially written file (the temporary file is removed on failure)
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, mode, **kwargs) as f:
+            yield f
+        os.replace(temp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temp_path)
+        raise
+
+def json_loads(data):
+    """Parse JSON from str or bytes (orjson when available)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_dumps(obj, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes (orjson when available)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode('utf-8')
+
+def json_dumps_pretty(obj) -> str:
+    """Indented JSON text with non-ASCII characters kept as-is (orjson when available)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode('utf-8')
+    return json.dumps(obj, indent=2, ensure_ascii=False)
@@ -14,19 +14,101 @@ Free tier: 1,000 calls/day, 60 calls/minute
 """
 
 import os
+import sys
+import copy
+import json
+import functools
+import time
+import hashlib
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from types import MappingProxyType
 from zoneinfo import ZoneInfo
 from typing import Dict, Optional, Any
+from utils import CACHE_DIR, atomic_open, json_dumps_pretty, json_loads
 
 # Nigeria timezone (Africa/Lagos, UTC+1)
 NIGERIA_TZ = ZoneInfo('Africa/Lagos')
+# Africa/Lagos is a fixed UTC+1 with no DST, so local clock times are plain offset arithmetic
+NIGERIA_UTC_OFFSET = 3600
 
 # Default location: Abuja, Nigeria
 DEFAULT_CITY = "Abuja,NG"
 DEFAULT_LAT = 9.0765  # Abuja latitude
 DEFAULT_LON = 7.3986  # Abuja longitude
 
+# Query parameters shared by every current-weather request
+_BASE_PARAMS = MappingProxyType({"units": "metric", "lang": "en"})
+
+# Responses are cached on disk for WEATHER_CACHE_TTL seconds (OpenWeather updates about every 10 minutes);
+# repeated runs within that window skip the network. DNR_WEATHER_CACHE=0 disables
+WEATHER_CACHE_ENABLED = os.getenv('DNR_WEATHER_CACHE', '1') != '0'
+WEATHER_CACHE_DIR = CACHE_DIR
+WEATHER_CACHE_TTL = int(os.getenv('WEATHER_CACHE_TTL', '600'))
+
+# Shared keep-alive session: weather and air-quality requests go to the same host, so TLS handshakes are reused.
+# Connection errors and transient statuses are retried twice with a short backoff; the last response is
+# returned as-is so raise_for_status() reports the real status
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=4,
+    max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504), raise_on_status=False),
+))
+
+# Air quality is a separate request; it runs here, overlapping the weather request, when coordinates are known up front
+_AIR_QUALITY_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix='air-quality')
+
+def _iso_local(ts: float) -> str:
+    """ISO 8601 Nigeria time for a Unix timestamp (same as datetime.isoformat())"""
+    return time.strftime('%Y-%m-%dT%H:%M:%S+01:00', time.gmtime(int(ts) + NIGERIA_UTC_OFFSET))
+
+def _iso_utc(ts: float) -> str:
+    """ISO 8601 UTC time for a Unix timestamp"""
+    return time.strftime('%Y-%m-%dT%H:%M:%S+00:00', time.gmtime(int(ts)))
+
+def _fmt_hms_local(ts: float) -> str:
+    """HH:MM:SS in Nigeria time for a Unix timestamp"""
+    secs = (int(ts) + NIGERIA_UTC_OFFSET) % 86400
+    hours, rest = divmod(secs, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+def _cache_path(url: str, params: Dict[str, Any]) -> str:
+    """Cache file for a request (the API key is left out of the key)"""
+    key = json.dumps([url, sorted((k, str(v)) for k, v in params.items() if k != 'appid')])
+    return os.path.join(WEATHER_CACHE_DIR, f"weather_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}.json")
+
+def _get_json(url: str, params: Dict[str, Any]) -> Any:
+    """GET a JSON endpoint, serving responses younger than WEATHER_CACHE_TTL from the disk cache
+    Raises requests.RequestException on HTTP errors and ValueError on invalid JSON.
+    """
+    cache_path = _cache_path(url, params) if WEATHER_CACHE_ENABLED else None
+    if cache_path:
+        try:
+            if time.time() - os.stat(cache_path).st_mtime < WEATHER_CACHE_TTL:
+                with open(cache_path, 'rb') as f:
+                    return json_loads(f.read())
+        except (OSError, ValueError):
+            pass
+    
+    response = _SESSION.get(url, params=params, timeout=10)
+    response.raise_for_status()
+    content = response.content
+    data = json_loads(content)
+    
+    if cache_path:
+        try:
+            os.makedirs(WEATHER_CACHE_DIR, exist_ok=True)
+            with atomic_open(cache_path, 'wb') as f:
+                f.write(content)
+        except OSError:
+            pass
+    return data
+
 def fetch_weather(
     city: Optional[str] = None,
     lat: Optional[float] = None,
@@ -64,6 +146,9 @@ def fetch_weather(
             'sunset': str
         }
     
+    Results are memoized in memory per WEATHER_CACHE_TTL window, so repeated
+    calls for the same location don't repeat the requests.
+    
     Raises:
         ValueError: If API key is missing
         requests.RequestException: If API request fails
@@ -79,42 +164,36 @@ def fetch_weather(
             "Get your API key at: https://openweathermap.org/api"
         )
     
-    # Use provided coordinates or city name
-    if lat is not None and lon is not None:
-        params = {
-            "lat": lat,
-            "lon": lon,
-            "appid": api_key,
-            "units": "metric",
-            "lang": "en"
-        }
-        location_desc = f"({lat}, {lon})"
-    elif city:
-        params = {
-            "q": city,
-            "appid": api_key,
-            "units": "metric",
-            "lang": "en"
-        }
+    if not WEATHER_CACHE_ENABLED:
+        return _fetch_weather_uncached(city, lat, lon, api_key)
+    bucket = int(time.time() // WEATHER_CACHE_TTL)
+    # Callers get their own copy, the cached result stays untouched
+    return copy.deepcopy(_fetch_weather_memo(city, lat, lon, api_key, bucket))
+
+def _fetch_weather_uncached(city: Optional[str], lat: Optional[float], lon: Optional[float], api_key: str) -> Dict[str, Any]:
+    """Request and build the weather result (see fetch_weather)"""
+    # Use provided coordinates, else city name, else the default Abuja coordinates
+    if (lat is None or lon is None) and city:
+        params = {**_BASE_PARAMS, "q": city, "appid": api_key}
         location_desc = city
+        known_coords = None  # Only known once the weather response arrives
     else:
-        # Use default Abuja coordinates
-        params = {
-            "lat": DEFAULT_LAT,
-            "lon": DEFAULT_LON,
-            "appid": api_key,
-            "units": "metric",
-            "lang": "en"
-        }
-        location_desc = DEFAULT_CITY
+        if lat is None or lon is None:
+            lat, lon, location_desc = DEFAULT_LAT, DEFAULT_LON, DEFAULT_CITY
+        else:
+            location_desc = f"({lat}, {lon})"
+        params = {**_BASE_PARAMS, "lat": lat, "lon": lon, "appid": api_key}
+        known_coords = (lat, lon)
+    
+    aq_future = None
+    if known_coords:
+        aq_future = _AIR_QUALITY_EXECUTOR.submit(fetch_air_quality, known_coords[0], known_coords[1], api_key)
     
     # Fetch current weather
     base_url = "https://api.openweathermap.org/data/2.5/weather"
     
     try:
-        response = requests.get(base_url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        data = _get_json(base_url, params)
     except requests.exceptions.RequestException as e:
         raise Exception(f"Failed to fetch weather data: {str(e)}")
     except ValueError as e:
@@ -134,61 +213,71 @@ def fetch_weather(
         weather_main = weather_list[0].get('main')
         weather_description = weather_list[0].get('description')
     
-    # Convert timestamps to Nigeria time
-    dt_utc = datetime.fromtimestamp(data.get('dt', 0), tz=ZoneInfo('UTC'))
-    dt_local = dt_utc.astimezone(NIGERIA_TZ)
-    
-    sunrise_utc = datetime.fromtimestamp(sys_data.get('sunrise', 0), tz=ZoneInfo('UTC'))
-    sunrise_local = sunrise_utc.astimezone(NIGERIA_TZ)
+    # Observation time (Unix seconds), formatted for Nigeria and UTC below
+    dt_ts = data.get('dt', 0)
     
-    sunset_utc = datetime.fromtimestamp(sys_data.get('sunset', 0), tz=ZoneInfo('UTC'))
-    sunset_local = sunset_utc.astimezone(NIGERIA_TZ)
+    # Read each reading once; 0 is a valid value (0°C, calm wind, due north), only None means missing
+    coord = data.get('coord', {})
+    temp = main.get('temp')
+    feels_like = main.get('feels_like')
+    wind_speed = wind.get('speed')
+    wind_deg = wind.get('deg')
+    visibility = data.get('visibility')
     
     # Build result dictionary
     result = {
         'location': f"{data.get('name', 'Unknown')}, {sys_data.get('country', 'NG')}",
         'coordinates': {
-            'lat': data.get('coord', {}).get('lat'),
-            'lon': data.get('coord', {}).get('lon')
+            'lat': coord.get('lat'),
+            'lon': coord.get('lon')
         },
-        'temperature_c': round(main.get('temp'), 1) if main.get('temp') else None,
-        'temperature_f': round(main.get('temp') * 9/5 + 32, 1) if main.get('temp') else None,
-        'feels_like_c': round(main.get('feels_like'), 1) if main.get('feels_like') else None,
+        'temperature_c': None if temp is None else round(temp, 1),
+        'temperature_f': None if temp is None else round(temp * 1.8 + 32, 1),
+        'feels_like_c': None if feels_like is None else round(feels_like, 1),
         'humidity': main.get('humidity'),
         'pressure_hPa': main.get('pressure'),
-        'wind_speed_m_s': round(wind.get('speed', 0), 2),
-        'wind_speed_kmh': round(wind.get('speed', 0) * 3.6, 2) if wind.get('speed') else None,
-        'wind_direction_deg': wind.get('deg'),
-        'wind_direction': _deg_to_direction(wind.get('deg')) if wind.get('deg') else None,
+        'wind_speed_m_s': round(wind_speed or 0, 2),
+        'wind_speed_kmh': None if wind_speed is None else round(wind_speed * 3.6, 2),
+        'wind_direction_deg': wind_deg,
+        'wind_direction': _deg_to_direction(wind_deg),
         'weather_main': weather_main,
         'weather_description': weather_description,
         'cloudiness': clouds.get('all'),
-        'visibility_m': data.get('visibility'),
-        'visibility_km': round(data.get('visibility', 0) / 1000, 2) if data.get('visibility') else None,
-        'datetime_local': dt_local.isoformat(),
-        'datetime_utc': dt_utc.isoformat(),
-        'sunrise': sunrise_local.strftime('%H:%M:%S'),
-        'sunset': sunset_local.strftime('%H:%M:%S'),
+        'visibility_m': visibility,
+        'visibility_km': None if visibility is None else round(visibility / 1000, 2),
+        'datetime_local': _iso_local(dt_ts),
+        'datetime_utc': _iso_utc(dt_ts),
+        'sunrise': _fmt_hms_local(sys_data.get('sunrise', 0)),
+        'sunset': _fmt_hms_local(sys_data.get('sunset', 0)),
         'timezone': 'Africa/Lagos',
     }
     
     # Try to fetch air quality data (requires separate API call)
     try:
-        if lat is not None and lon is not None:
-            coords = (lat, lon)
+        air_quality = None
+        if aq_future is not None:
+            air_quality = aq_future.result()
         else:
-            coords = (data.get('coord', {}).get('lat'), data.get('coord', {}).get('lon'))
-        
-        if coords[0] and coords[1]:
-            air_quality = fetch_air_quality(coords[0], coords[1], api_key)
-            if air_quality:
-                result['air_quality'] = air_quality
-    except Exception as e:
+            coords = (coord.get('lat'), coord.get('lon'))
+            if coords[0] is not None and coords[1] is not None:
+                air_quality = fetch_air_quality(coords[0], coords[1], api_key)
+        if air_quality:
+            result['air_quality'] = air_quality
+    except (requests.RequestException, ValueError, KeyError) as e:
         # Air quality is optional, don't fail if it's not available
         print(f"  ⚠️  无法获取空气质量数据: {str(e)[:50]}")
     
     return result
 
+@functools.lru_cache(maxsize=64)
+def _fetch_weather_memo(city: Optional[str], lat: Optional[float], lon: Optional[float], api_key: str, bucket: int) -> Dict[str, Any]:
+    """_fetch_weather_uncached memoized per time bucket (failures are not cached)"""
+    return _fetch_weather_uncached(city, lat, lon, api_key)
+
+# AQI descriptions (OpenWeather 1-5 scale, index aqi - 1) and the pollutant components reported, in output order
+_AQI_LEVELS = ("Good", "Fair", "Moderate", "Poor", "Very Poor")
+_AQ_COMPONENTS = ('co', 'no2', 'o3', 'pm2_5', 'pm10', 'so2')
+
 def fetch_air_quality(lat: float, lon: float, api_key: str) -> Optional[Dict[str, Any]]:
     """
     Fetch air quality data from OpenWeatherMap Air Pollution API
@@ -209,49 +298,34 @@ def fetch_air_quality(lat: float, lon: float, api_key: str) -> Optional[Dict[str
             "appid": api_key
         }
         
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        data = _get_json(url, params)
         
         if 'list' in data and len(data['list']) > 0:
             aq_data = data['list'][0]
             components = aq_data.get('components', {})
             aqi = aq_data.get('main', {}).get('aqi')  # 1-5 scale
             
-            # AQI descriptions
-            aqi_levels = {
-                1: "Good",
-                2: "Fair",
-                3: "Moderate",
-                4: "Poor",
-                5: "Very Poor"
-            }
-            
             return {
                 'aqi': aqi,
-                'aqi_level': aqi_levels.get(aqi, "Unknown"),
-                'co': round(components.get('co', 0), 2),
-                'no2': round(components.get('no2', 0), 2),
-                'o3': round(components.get('o3', 0), 2),
-                'pm2_5': round(components.get('pm2_5', 0), 2),
-                'pm10': round(components.get('pm10', 0), 2),
-                'so2': round(components.get('so2', 0), 2),
+                'aqi_level': _AQI_LEVELS[aqi - 1] if isinstance(aqi, int) and 1 <= aqi <= 5 else "Unknown",
+                **{key: round(components.get(key, 0), 2) for key in _AQ_COMPONENTS},
             }
-    except Exception:
+    except (requests.RequestException, ValueError, KeyError):
         # Air quality API might not be available in free tier or might fail
         return None
     
     return None
 
+# 16-point compass, 22.5° per sector
+_DIRECTIONS = ("N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE",
+               "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW")
+
 def _deg_to_direction(degrees: int) -> str:
     """Convert wind direction in degrees to cardinal direction"""
     if degrees is None:
         return None
-    
-    directions = ["N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE",
-                  "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW"]
-    index = round(degrees / 22.5) % 16
-    return directions[index]
+    # & 15 wraps 360° back to N (16 sectors is a power of two)
+    return _DIRECTIONS[int(degrees / 22.5 + 0.5) & 15]
 
 def format_weather_summary(weather: Dict[str, Any]) -> str:
     """
@@ -269,12 +343,16 @@ def format_weather_summary(weather: Dict[str, Any]) -> str:
     lines.append(f"📍 {weather.get('location', 'Unknown location')}")
     datetime_local = weather.get('datetime_local', '')
     if datetime_local:
-        try:
-            dt = datetime.fromisoformat(datetime_local)
-            lines.append(f"🕐 {dt.strftime('%Y-%m-%d %H:%M:%S')} (尼日利亚时间)")
-        except (ValueError, TypeError):
-            # If datetime parsing fails, skip time line
-            pass
+        if isinstance(datetime_local, str) and len(datetime_local) >= 19 and datetime_local[10] == 'T':
+            # fetch_weather emits 'YYYY-MM-DDTHH:MM:SS+01:00': take date and time as-is instead of parsing
+            lines.append(f"🕐 {datetime_local[:10]} {datetime_local[11:19]} (尼日利亚时间)")
+        else:
+            try:
+                dt = datetime.fromisoformat(datetime_local)
+                lines.append(f"🕐 {dt.strftime('%Y-%m-%d %H:%M:%S')} (尼日利亚时间)")
+            except (ValueError, TypeError):
+                # If datetime parsing fails, skip time line
+                pass
     
     # Temperature
     temp_c = weather.get('temperature_c')
@@ -317,8 +395,6 @@ def format_weather_summary(weather: Dict[str, Any]) -> str:
 
 def main():
     """Main function for command-line usage"""
-    import sys
-    
     # Get city from command line or environment variable
     city = None
     if len(sys.argv) > 1:
@@ -333,8 +409,7 @@ def main():
         print("\n" + "=" * 60)
         print("天气信息 (结构化数据)")
         print("=" * 60)
-        import json
-        print(json.dumps(weather, indent=2, ensure_ascii=False))
+        print(json_dumps_pretty(weather))
         
         print("\n" + "=" * 60)
         print("天气摘要")